@@ -11,15 +11,134 @@ HEADERS = {
     "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
 }
 
+# 数据接口 — 按主机的连接池与令牌桶限速
+# rate: 每秒请求数, burst: 允许的突发请求数, referer: 该主机请求的 Referer
+HTTP_POOL_SIZE = 10
+HOST_LIMITS = {
+    "push2.eastmoney.com": {
+        "rate": 6, "burst": 6, "referer": "https://data.eastmoney.com/",
+    },
+    "vip.stock.finance.sina.com.cn": {
+        "rate": 10, "burst": 8, "referer": "https://finance.sina.com.cn/",
+    },
+    "datacenter-web.eastmoney.com": {
+        "rate": 4, "burst": 2, "referer": "https://data.eastmoney.com/",
+    },
+    "emweb.securities.eastmoney.com": {
+        "rate": 6, "burst": 6, "referer": "https://data.eastmoney.com/",
+    },
+}
+DEFAULT_HOST_LIMIT = {"rate": 3, "burst": 3}
+
+# 慢变接口的响应缓存 — {接口名: TTL秒}，接口名为 reportName 或 URL 末段路径
+HTTP_CACHE_TTLS = {
+    "RPT_F10_BASIC_ORGINFO": 24 * 3600,   # EM2016 行业分类
+    "CompanySurveyAjax": 24 * 3600,       # F10 公司概况 (sshy)
+}
+HTTP_CACHE_MAX_ENTRIES = 20000
+
+# 个股元数据库 — 过期时间(秒) / 补齐时的并发请求数
+SECURITY_META_MAX_AGE = 7 * 24 * 3600
+SECURITY_META_WORKERS = 6
+
+# 涨停历史保留的交易日数（推算连板用） / 是否额外请求 AKShare 涨停池（补充所属行业）
+LIMIT_HISTORY_DAYS = 30
+ZT_POOL_ENABLED = False
+
+# 沪深交易所休市日（周一至周五中的节假日），判断交易日 / 推算连板用；
+# 每年按交易所休市安排公告补充
+TRADING_HOLIDAYS = (
+    "2026-01-01", "2026-01-02",
+    "2026-02-16", "2026-02-17", "2026-02-18", "2026-02-19", "2026-02-20", "2026-02-23",
+    "2026-04-06",
+    "2026-05-01", "2026-05-04", "2026-05-05",
+    "2026-06-19",
+    "2026-09-25",
+    "2026-10-01", "2026-10-02", "2026-10-05", "2026-10-06", "2026-10-07",
+)
+
+# 证券主表 — 每日重建时的每页条数 / 并发请求数
+SECURITY_MASTER_PAGE_SIZE = 100
+SECURITY_MASTER_WORKERS = 4
+
+# 板块成分映射 — 每日重建时的每页条数 / 并发请求数
+SECTOR_MEMBERSHIP_PAGE_SIZE = 100
+SECTOR_MEMBERSHIP_WORKERS = 4
+
 # 新闻采集超时(秒)
 REQUEST_TIMEOUT = 15
 
+# 新闻采集截止时间(秒) — 到点返回已到达的结果，未完成的源被取消
+NEWS_DEADLINE = 8.0
+# 单个新闻源的时间预算(秒)，未列出的源使用 NEWS_DEADLINE
+NEWS_SOURCE_BUDGETS = {
+    "eastmoney": 8.0,
+    "sina": 6.0,
+    "jin10": 5.0,
+}
+
+# 增量采集 — 游标断档时最多向前翻的页数 / 近期新闻窗口(小时, 条数上限) / 已见记录保留天数
+NEWS_MAX_PAGES = 5
+NEWS_WINDOW_HOURS = 12
+NEWS_WINDOW_MAX = 300
+NEWS_SEEN_DAYS = 3
+
+# 东方财富新闻 — 每个栏目最多翻的页数 / 并发请求数
+EASTMONEY_PAGE_DEPTH = 3
+EASTMONEY_CONCURRENCY = 4
+
+# 金十快讯轮询 — 轮询间隔(秒) / 待消费队列上限
+JIN10_POLL_INTERVAL = 20
+JIN10_QUEUE_MAX = 1000
+
+# 跨来源近似重复判定 — 标题二元组 Jaccard 相似度阈值（只差数字、个股的不同事件
+# 也能到 0.6~0.8，另有数字 / 个股 / 涨跌方向差异时不合并）
+NEWS_DUP_THRESHOLD = 0.8
+
+# 新闻采集共享客户端 — HTTP/2 (需安装 h2) / 连接池上限 / 空闲连接保持(秒)
+# 空闲保持只覆盖同一次运行内的连续请求和金十轮询；两次定时报告间隔数小时，
+# 服务端早已关闭空闲连接，调大没有意义
+NEWS_HTTP2 = True
+NEWS_MAX_CONNECTIONS = 20
+NEWS_MAX_KEEPALIVE = 10
+NEWS_KEEPALIVE_EXPIRY = 60
+
+# 资金流向 — push2 超过该秒数未返回时并发启动 AKShare 备用源
+FUND_FLOW_HEDGE_AFTER = 2.0
+# 全市场模式：一次翻页拉取全A个股资金流，排行/百分位在本地计算
+# （各板块主力净流入合计由 data.sector_engine.aggregate_sectors 按成分汇总）
+FUND_FLOW_FULL_MARKET = True
+FUND_FLOW_PAGE_SIZE = 100
+FUND_FLOW_UNIVERSE_HEDGE_AFTER = 12.0
+
+# 日内资金流采样 — 采样间隔(秒) / 环形缓冲时间槽数 / 板块、个股容量 / 变化窗口(分钟)
+FLOW_SAMPLE_INTERVAL = 60
+FLOW_RING_SLOTS = 300
+FLOW_SECTOR_CAPACITY = 200
+FLOW_STOCK_CAPACITY = 6000
+FLOW_DELTA_WINDOWS = (5, 15, 30)
+
 # AKShare 调用间隔(秒) — 防限速
 AKSHARE_INTERVAL = 0.3
 
+# 全A快照 — 每页行数 / 并发翻页数 / 单页失败重试次数
+SNAPSHOT_PAGE_SIZE = 100
+SNAPSHOT_CONCURRENCY = 4
+SNAPSHOT_RETRIES = 2
+
 # 报告输出目录
 OUTPUT_DIR = "output"
 
+# 本地缓存目录（接口缓存、元数据库等）
+CACHE_DIR = "cache"
+
+# 历史数据归档目录（新闻库等，长期保留）
+ARCHIVE_DIR = "archive"
+
+# 列式快照库（ARCHIVE_DIR/snapshots，需 pyarrow）— Arrow IPC 压缩算法
+# zstd / lz4；None 不压缩（内存映射读取可零拷贝，文件更大）
+SNAPSHOT_COMPRESSION = "zstd"
+
 # 板块 / 个股 TOP N
 TOP_SECTOR = 5
 TOP_STOCK = 10
@@ -27,6 +146,8 @@ TOP_STOCK = 10
 # 定时调度 (周一至周五)
 SCHEDULE_MORNING = {"hour": 11, "minute": 35}
 SCHEDULE_AFTERNOON = {"hour": 15, "minute": 5}
+# 证券主表 / 板块成分映射的后台重建（开盘前，不与报告的 push2 请求争抢限速）
+SCHEDULE_REFERENCE_REBUILD = {"hour": 9, "minute": 0}
 
 # 自选股 — {代码: 名称}
 # 关注板块 — {板块代码: 板块名称}
@@ -34,6 +155,8 @@ SCHEDULE_AFTERNOON = {"hour": 15, "minute": 5}
 WATCH_SECTORS = {
     "BK0473": "证券",
 }
+# 关注板块成分股每页条数（按首页 total 并发翻页取全）
+WATCH_SECTOR_PAGE_SIZE = 100
 
 # 自选股 — {代码: 名称}
 WATCHLIST = {
@@ -41,3 +164,6 @@ WATCHLIST = {
     "600683": "京投发展",
     "300749": "顶固集创",
 }
+# 自选股请求 — 每组 secid 数（控制 URL 长度）/ 单组失败重试次数
+WATCHLIST_CHUNK_SIZE = 100
+WATCHLIST_RETRIES = 2
@@ -0,0 +1,265 @@
+"""日内资金流时间序列 — 固定大小的 NumPy 环形缓冲
+
+交易时段内每 FLOW_SAMPLE_INTERVAL 秒采样一次板块与个股主力净流入，
+写入预分配的 float32 环形缓冲（标的 × 时间槽）。报告和 Web 查询
+5/15/30 分钟变化时只读缓冲，不再发请求。收盘后当日序列写成
+CACHE_DIR/flow/ 下的内存映射文件（.npy + .json），单独启动 Web
+或重启后从文件读取。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from datetime import time as dtime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import (FLOW_DELTA_WINDOWS, FLOW_RING_SLOTS, FLOW_SAMPLE_INTERVAL,
+                    FLOW_SECTOR_CAPACITY, FLOW_STOCK_CAPACITY)
+from data.fund_flow import _push2_flow_universe, _push2_sector_flow
+from data.limits import is_trading_day
+from storage import cache_path
+
+_MAIN_FLOW = "今日主力净流入-净额"
+_SESSIONS = ((dtime(9, 30), dtime(11, 30)), (dtime(13, 0), dtime(15, 0)))
+
+
+def in_trading_session(now: datetime) -> bool:
+    """是否处于 A股连续竞价时段（周末和 TRADING_HOLIDAYS 中的休市日不算）"""
+    if not is_trading_day(now.date()):
+        return False
+    t = now.time()
+    return any(start <= t <= end for start, end in _SESSIONS)
+
+
+class FlowRing:
+    """标的 × 时间槽的环形缓冲，线程安全
+
+    标的在首次出现时分配行，超过 capacity 的新标的被忽略；
+    时间槽写满后覆盖最旧的一列。
+    """
+
+    def __init__(self, capacity: int, slots: int, interval: float) -> None:
+        self.interval = interval
+        self.values = np.full((capacity, slots), np.nan, dtype=np.float32)
+        self.times = np.full(slots, np.nan)  # 各槽采样时间戳
+        self.keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._head = 0        # 下一个写入的槽
+        self.count = 0        # 已写入的槽数（不超过 slots）
+        self._lock = threading.Lock()
+
+    @property
+    def slots(self) -> int:
+        return self.values.shape[1]
+
+    def _rows(self, keys: Iterable[str]) -> np.ndarray:
+        capacity = self.values.shape[0]
+        rows = []
+        for key in keys:
+            row = self._index.get(key)
+            if row is None:
+                if len(self.keys) >= capacity:
+                    rows.append(-1)
+                    continue
+                row = len(self.keys)
+                self._index[key] = row
+                self.keys.append(key)
+            rows.append(row)
+        return np.asarray(rows, dtype=np.intp)
+
+    def record(self, series: pd.Series, ts: float) -> None:
+        """写入一次采样（索引为标的，值为主力净流入）"""
+        vals = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float32,
+                                                               na_value=np.nan)
+        with self._lock:
+            rows = self._rows(series.index.astype(str))
+            ok = rows >= 0
+            slot = self._head
+            self.values[:, slot] = np.nan
+            self.values[rows[ok], slot] = vals[ok]
+            self.times[slot] = ts
+            self._head = (slot + 1) % self.slots
+            self.count = min(self.count + 1, self.slots)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.values[:] = np.nan
+            self.times[:] = np.nan
+            self.keys = []
+            self._index = {}
+            self._head = 0
+            self.count = 0
+
+    def deltas(self, windows: Sequence[int] = FLOW_DELTA_WINDOWS,
+               keys: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """最新值及其相对 N 分钟前的变化，列为 最新 / 5分钟 / 15分钟 ...
+
+        N 分钟前取不晚于该时刻（容差半个采样间隔）的最近一次采样；
+        历史不足 N 分钟的列为 NaN。不指定 keys 时略去最新一次未出现的标的。
+        """
+        columns = ["最新"] + [f"{m}分钟" for m in windows]
+        with self._lock:
+            n = len(self.keys)
+            if not self.count or not n:
+                return pd.DataFrame(columns=columns, dtype="float64")
+            last = (self._head - 1) % self.slots
+            latest = self.values[:n, last].astype(np.float64)
+            data = {"最新": latest}
+            for m in windows:
+                target = self.times[last] - m * 60 + self.interval / 2
+                cand = np.flatnonzero(self.times <= target)
+                if len(cand):
+                    ref = cand[np.argmax(self.times[cand])]
+                    data[f"{m}分钟"] = latest - self.values[:n, ref]
+                else:
+                    data[f"{m}分钟"] = np.full(n, np.nan)
+            df = pd.DataFrame(data, index=list(self.keys))
+        if keys is not None:
+            return df.reindex([str(k) for k in keys])
+        return df[df["最新"].notna()]
+
+    def updated_at(self) -> Optional[datetime]:
+        with self._lock:
+            if not self.count:
+                return None
+            return datetime.fromtimestamp(self.times[(self._head - 1) % self.slots])
+
+    # ── 持久化 ──
+
+    def save(self, prefix: str) -> None:
+        """按时间顺序写出 prefix.npy（内存映射）和 prefix.json（标的、时间）"""
+        with self._lock:
+            n = len(self.keys)
+            order = [(self._head - self.count + i) % self.slots for i in range(self.count)]
+            out = np.lib.format.open_memmap(prefix + ".npy", mode="w+",
+                                            dtype=np.float32, shape=(n, len(order)))
+            out[:] = self.values[:n][:, order]
+            out.flush()
+            del out
+            meta = {
+                "keys": self.keys,
+                "times": [float(t) for t in self.times[order]],
+                "interval": self.interval,
+            }
+        with open(prefix + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, prefix: str) -> Optional["FlowRing"]:
+        """以只读内存映射方式打开 save() 写出的序列；文件不存在返回 None"""
+        if not (os.path.exists(prefix + ".npy") and os.path.exists(prefix + ".json")):
+            return None
+        with open(prefix + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        values = np.load(prefix + ".npy", mmap_mode="r")
+        ring = cls.__new__(cls)
+        ring.interval = meta["interval"]
+        ring.values = values
+        ring.times = np.asarray(meta["times"], dtype=np.float64)
+        ring.keys = list(meta["keys"])
+        ring._index = {k: i for i, k in enumerate(ring.keys)}
+        ring._head = 0
+        ring.count = values.shape[1]
+        ring._lock = threading.Lock()
+        return ring
+
+
+class FlowSampler:
+    """日内资金流采样器：事件循环上的常驻任务"""
+
+    def __init__(self, directory: str, interval: float = FLOW_SAMPLE_INTERVAL,
+                 slots: int = FLOW_RING_SLOTS) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.rings = {
+            "sector": FlowRing(FLOW_SECTOR_CAPACITY, slots, interval),
+            "stock": FlowRing(FLOW_STOCK_CAPACITY, slots, interval),
+        }
+        self._day = None
+        self._saved = False
+        self._task: Optional[asyncio.Task] = None
+        self._loaded: Dict[str, FlowRing] = {}
+
+    def _prefix(self, kind: str, day) -> str:
+        return os.path.join(self.directory, f"{day:%Y%m%d}_{kind}")
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止采样；当日有未保存的采样则写盘"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.rings["stock"].count and not self._saved:
+            await asyncio.to_thread(self.save)
+
+    async def _run(self) -> None:
+        while True:
+            start = time.monotonic()
+            now = datetime.now()
+            if now.date() != self._day:
+                for ring in self.rings.values():
+                    ring.clear()
+                self._day = now.date()
+                self._saved = False
+            if in_trading_session(now):
+                try:
+                    await self.sample()
+                except Exception as e:
+                    print(f"  [资金采样] 失败: {e.__class__.__name__}")
+            elif now.time() > _SESSIONS[-1][1] and self.rings["stock"].count and not self._saved:
+                await asyncio.to_thread(self.save)
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - start)))
+
+    async def sample(self) -> None:
+        """采样一次板块与全市场个股主力净流入"""
+        ts = time.time()
+        sectors, universe = await asyncio.gather(
+            _push2_sector_flow(size=FLOW_SECTOR_CAPACITY), _push2_flow_universe(),
+        )
+        self.rings["sector"].record(sectors.set_index("名称")[_MAIN_FLOW], ts)
+        self.rings["stock"].record(universe[_MAIN_FLOW], ts)
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        day = self._day or datetime.now().date()
+        for kind, ring in self.rings.items():
+            ring.save(self._prefix(kind, day))
+        self._saved = True
+        print(f"[资金采样] 当日序列已保存 ({self.rings['stock'].count} 个时间点)")
+
+    def ring(self, kind: str) -> Optional[FlowRing]:
+        """有采样用内存中的缓冲，否则读当日已保存的序列"""
+        live = self.rings[kind]
+        if live.count:
+            return live
+        prefix = self._prefix(kind, datetime.now().date())
+        if prefix not in self._loaded:
+            saved = FlowRing.load(prefix)
+            if saved is None:
+                return None
+            self._loaded[prefix] = saved
+        return self._loaded[prefix]
+
+    def deltas(self, kind: str = "sector", windows: Sequence[int] = FLOW_DELTA_WINDOWS,
+               keys: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """kind: sector（按板块名）/ stock（按代码）"""
+        ring = self.ring(kind)
+        if ring is None:
+            return pd.DataFrame(columns=["最新"] + [f"{m}分钟" for m in windows],
+                                dtype="float64")
+        return ring.deltas(windows, keys)
+
+
+flow_sampler = FlowSampler(cache_path("flow"))
@@ -3,44 +3,38 @@
 push2.eastmoney.com 提供实时资金流向排行数据。
 """
 
+import asyncio
+import math
 import time
+from typing import Optional
 
+import numpy as np
 import pandas as pd
-import requests
 
-from config import AKSHARE_INTERVAL, TOP_STOCK
+from config import (AKSHARE_INTERVAL, FUND_FLOW_FULL_MARKET, FUND_FLOW_HEDGE_AFTER,
+                    FUND_FLOW_PAGE_SIZE, FUND_FLOW_UNIVERSE_HEDGE_AFTER, TOP_STOCK)
 from models import FundFlowReport
+from net import client
 
 
-_session = requests.Session()
-_session.trust_env = False
-_session.headers.update({
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Referer": "https://data.eastmoney.com/",
-    "Accept": "application/json, text/javascript, */*; q=0.01",
-})
-
 _PUSH2_URL = "https://push2.eastmoney.com/api/qt/clist/get"
 
 
 # ───────── 东方财富 push2 API ─────────
 
-def _push2_sector_flow() -> pd.DataFrame:
+async def _push2_sector_flow(size: int = None) -> pd.DataFrame:
     """板块资金流向排行（按主力净流入降序）"""
+    if size is None:
+        size = TOP_STOCK
     params = {
-        "pn": 1, "pz": TOP_STOCK, "po": 1, "np": 1,
+        "pn": 1, "pz": size, "po": 1, "np": 1,
         "ut": "b2884a393a59ad64002292a3e90d46a5",
         "fltt": 2, "invt": 2, "fid": "f62",
         "fs": "m:90+t:2",
         "fields": "f12,f14,f2,f3,f62,f184,f66,f69,f72,f75,f78,f81",
         "_": int(time.time() * 1000),
     }
-    r = _session.get(_PUSH2_URL, params=params, timeout=10)
-    data = r.json()
+    data = await client.aget_json(_PUSH2_URL, params=params, timeout=10)
     diffs = data.get("data", {}).get("diff", [])
     if not diffs:
         raise RuntimeError("push2 板块资金流无数据")
@@ -58,7 +52,7 @@ def _push2_sector_flow() -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def _push2_stock_flow(ascending: bool = False, size: int = None) -> pd.DataFrame:
+async def _push2_stock_flow(ascending: bool = False, size: int = None) -> pd.DataFrame:
     """个股资金流排行
     ascending=False: 净流入TOP（降序）
     ascending=True:  净流出TOP（升序）
@@ -73,8 +67,7 @@ def _push2_stock_flow(ascending: bool = False, size: int = None) -> pd.DataFrame
         "fields": "f12,f14,f2,f3,f62,f184,f66,f69,f72,f75,f78,f81",
         "_": int(time.time() * 1000),
     }
-    r = _session.get(_PUSH2_URL, params=params, timeout=10)
-    data = r.json()
+    data = await client.aget_json(_PUSH2_URL, params=params, timeout=10)
     diffs = data.get("data", {}).get("diff", [])
     if not diffs:
         raise RuntimeError("push2 个股资金流无数据")
@@ -94,34 +87,135 @@ def _push2_stock_flow(ascending: bool = False, size: int = None) -> pd.DataFrame
     return pd.DataFrame(rows)
 
 
-def _fetch_flow_push2() -> FundFlowReport:
-    """使用 push2 API 获取资金流向"""
-    report = FundFlowReport()
+_UNIVERSE_FIELDS = {
+    "f12": "代码", "f14": "名称", "f2": "最新价", "f3": "涨跌幅",
+    "f62": "今日主力净流入-净额", "f184": "今日主力净流入-净占比",
+    "f66": "今日超大单净流入-净额", "f72": "今日大单净流入-净额",
+    "f100": "所属行业",
+}
+_UNIVERSE_NUMERIC = ("最新价", "涨跌幅", "今日主力净流入-净额", "今日主力净流入-净占比",
+                     "今日超大单净流入-净额", "今日大单净流入-净额")
+_RANK_COLUMNS = ("代码", "名称", "最新价", "涨跌幅", "今日主力净流入-净额",
+                 "今日主力净流入-净占比", "今日超大单净流入-净额", "今日大单净流入-净额")
+_MAIN_FLOW = "今日主力净流入-净额"
 
-    print("[资金] 获取板块资金流排行...")
-    try:
-        report.sector_flow = _push2_sector_flow()
-        print(f"  -> {len(report.sector_flow)} 个板块")
-    except Exception as e:
-        print(f"  板块资金流失败: {e}")
 
-    time.sleep(0.3)
+async def _push2_flow_page(page: int) -> dict:
+    # 按代码分页：代码顺序不随行情变化，并发翻页不会重复或漏掉个股
+    params = {
+        "pn": page, "pz": FUND_FLOW_PAGE_SIZE, "po": 0, "np": 1,
+        "ut": "b2884a393a59ad64002292a3e90d46a5",
+        "fltt": 2, "invt": 2, "fid": "f12",
+        "fs": "m:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23,m:0+t:81+s:2048",
+        "fields": ",".join(_UNIVERSE_FIELDS),
+        "_": int(time.time() * 1000),
+    }
+    data = await client.aget_json(_PUSH2_URL, params=params, timeout=10)
+    return data.get("data") or {}
 
-    print("[资金] 获取个股资金净流入 TOP...")
-    try:
-        report.stock_inflow = _push2_stock_flow(ascending=False)
-        print(f"  -> {len(report.stock_inflow)} 只")
-    except Exception as e:
-        print(f"  个股净流入失败: {e}")
 
-    time.sleep(0.3)
+async def _push2_flow_universe() -> pd.DataFrame:
+    """全A个股资金流（按代码分页、按 total 规划页数，首页之后并发翻页），以代码为索引
 
-    print("[资金] 获取个股资金净流出 TOP...")
-    try:
-        report.stock_outflow = _push2_stock_flow(ascending=True)
-        print(f"  -> {len(report.stock_outflow)} 只")
-    except Exception as e:
-        print(f"  个股净流出失败: {e}")
+    排行、百分位都在本地由 flow_rank / flow_percentile 计算。
+    """
+    first = await _push2_flow_page(1)
+    total = int(first.get("total") or 0)
+    if not first.get("diff"):
+        raise RuntimeError("push2 全市场资金流无数据")
+    pages = max(1, math.ceil(total / FUND_FLOW_PAGE_SIZE))
+    rest = await asyncio.gather(*(_push2_flow_page(p) for p in range(2, pages + 1)))
+
+    records = []
+    for page in [first, *rest]:
+        records.extend(page.get("diff") or [])
+    df = pd.DataFrame.from_records(records, columns=list(_UNIVERSE_FIELDS))
+    df = df.rename(columns=_UNIVERSE_FIELDS)
+    for col in _UNIVERSE_NUMERIC:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    df["代码"] = df["代码"].astype(str)
+    df["名称"] = df["名称"].astype(str)
+    df["所属行业"] = df["所属行业"].fillna("").astype(str).replace("-", "")
+    df = df.drop_duplicates("代码").set_index("代码", drop=False)
+    df.index.name = None
+    df["主力净流入百分位"] = flow_percentile(df)
+    return df
+
+
+# ───────── 全市场资金流的本地排行 ─────────
+
+def flow_rank(universe: pd.DataFrame, n: int = TOP_STOCK, column: str = _MAIN_FLOW,
+              ascending: bool = False) -> pd.DataFrame:
+    """按列取前 N（ascending=True 取最小的 N 个），argpartition 选出后只排这 N 行"""
+    values = universe[column].to_numpy(dtype="float64", na_value=np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if ascending:
+        keyed = values[valid]
+    else:
+        keyed = -values[valid]
+    n = min(n, len(valid))
+    if n <= 0:
+        return universe.iloc[:0][list(_RANK_COLUMNS)].reset_index(drop=True)
+    part = np.argpartition(keyed, n - 1)[:n]
+    picked = valid[part[np.argsort(keyed[part], kind="stable")]]
+    return universe.iloc[picked][list(_RANK_COLUMNS)].reset_index(drop=True)
+
+
+def flow_percentile(universe: pd.DataFrame, column: str = _MAIN_FLOW) -> pd.Series:
+    """各股该列在全市场的百分位（0~100，越大越靠前；缺失值为 NaN）"""
+    values = universe[column].to_numpy(dtype="float64", na_value=np.nan)
+    pct = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid):
+        order = np.argsort(values[valid], kind="stable")
+        ranks = np.empty(len(valid))
+        ranks[order] = np.arange(1, len(valid) + 1)
+        pct[valid] = ranks / len(valid) * 100
+    return pd.Series(pct, index=universe.index, name="主力净流入百分位")
+
+
+async def _fetch_flow_push2() -> FundFlowReport:
+    """使用 push2 API 获取资金流向（三个排行并发请求）"""
+    report = FundFlowReport()
+
+    if FUND_FLOW_FULL_MARKET:
+        print("[资金] 获取板块资金流 + 全市场个股资金流...")
+        sector, universe = await asyncio.gather(
+            _push2_sector_flow(), _push2_flow_universe(), return_exceptions=True,
+        )
+        if isinstance(universe, Exception):
+            inflow = outflow = universe
+        else:
+            report.universe = universe
+            print(f"  -> 全市场 {len(universe)} 只")
+            inflow = flow_rank(universe, TOP_STOCK)
+            outflow = flow_rank(universe, TOP_STOCK, ascending=True)
+    else:
+        print("[资金] 获取板块资金流 + 个股净流入/净流出 TOP...")
+        sector, inflow, outflow = await asyncio.gather(
+            _push2_sector_flow(),
+            _push2_stock_flow(ascending=False),
+            _push2_stock_flow(ascending=True),
+            return_exceptions=True,
+        )
+
+    if isinstance(sector, Exception):
+        print(f"  板块资金流失败: {sector}")
+    else:
+        report.sector_flow = sector
+        print(f"  -> {len(sector)} 个板块")
+
+    if isinstance(inflow, Exception):
+        print(f"  个股净流入失败: {inflow}")
+    else:
+        report.stock_inflow = inflow
+        print(f"  -> 净流入 {len(inflow)} 只")
+
+    if isinstance(outflow, Exception):
+        print(f"  个股净流出失败: {outflow}")
+    else:
+        report.stock_outflow = outflow
+        print(f"  -> 净流出 {len(outflow)} 只")
 
     return report
 
@@ -155,18 +249,54 @@ def _fetch_flow_akshare() -> FundFlowReport:
 
 # ───────── 对外接口 ─────────
 
-def fetch_fund_flow() -> FundFlowReport:
-    """获取板块资金流 + 个股资金流排行（自动选源）"""
+def _usable(task: asyncio.Task, label: str) -> Optional[FundFlowReport]:
+    """取出已完成任务的报告；失败或无数据返回 None"""
     try:
-        report = _fetch_flow_push2()
-        if not report.sector_flow.empty or not report.stock_inflow.empty:
-            return report
+        report = task.result()
     except Exception as e:
-        print(f"  push2资金流失败({e.__class__.__name__})")
+        print(f"  {label}资金流失败({e.__class__.__name__})")
+        return None
+    if not report.sector_flow.empty or not report.stock_inflow.empty:
+        return report
+    print(f"  {label}资金流无数据")
+    return None
+
+
+async def fetch_fund_flow(hedge_after: Optional[float] = None) -> FundFlowReport:
+    """获取板块资金流 + 个股资金流排行（自动选源）
+
+    push2 超过 hedge_after 秒仍未返回（或已失败）时并发启动 AKShare 备用源，
+    取先返回有效数据的一方，另一方取消。全市场模式需翻页，默认等待更久。
+    """
+    if hedge_after is None:
+        hedge_after = (FUND_FLOW_UNIVERSE_HEDGE_AFTER if FUND_FLOW_FULL_MARKET
+                       else FUND_FLOW_HEDGE_AFTER)
+    labels = {}
+    primary = asyncio.create_task(_fetch_flow_push2())
+    labels[primary] = "push2"
+    pending = {primary}
+
+    done, pending = await asyncio.wait(pending, timeout=hedge_after)
+    if primary in done:
+        report = _usable(primary, labels[primary])
+        if report is not None:
+            return report
+    else:
+        print(f"[资金] push2 超过 {hedge_after:.1f}s 未返回，并发启动 AKShare 备用")
+
+    backup = asyncio.create_task(asyncio.to_thread(_fetch_flow_akshare))
+    labels[backup] = "AKShare"
+    pending.add(backup)
 
     try:
-        return _fetch_flow_akshare()
-    except Exception as e:
-        print(f"  AKShare资金流也失败: {e.__class__.__name__}")
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                report = _usable(task, labels[task])
+                if report is not None:
+                    return report
+    finally:
+        for task in pending:
+            task.cancel()
 
     return FundFlowReport()
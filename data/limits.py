@@ -0,0 +1,160 @@
+"""涨跌停判定 — 按板块规则由昨收计算涨跌停价，全市场一次向量化判定
+
+涨跌幅限制：主板 10%、创业板/科创板 20%、北交所 30%，主板 ST 5%；
+上市前 5 个交易日不设涨跌幅限制。涨跌停价 = 昨收 × (1 ± 限制) 四舍五入到分。
+
+连板数由本地保存的历史涨停名单推出：SQLite 记录每个交易日的涨停代码，
+今日涨停且之前连续 N 个交易日都涨停即为 N+1 连板。交易日按周一至周五
+扣除 TRADING_HOLIDAYS 推算；未运行的交易日没有记录，连板会在该日中断。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import LIMIT_HISTORY_DAYS, TRADING_HOLIDAYS
+from data.security_master import BSE, CHINEXT, MAIN, STAR, security_master
+from storage import cache_path, open_sqlite
+
+_BOARD_LIMITS = {MAIN: 0.10, CHINEXT: 0.20, STAR: 0.20, BSE: 0.30}
+_ST_LIMIT = 0.05
+_NEW_LISTING_DAYS = 5
+_EPS = 1e-6
+_HOLIDAYS = np.array(TRADING_HOLIDAYS, dtype="datetime64[D]")
+
+
+def is_trading_day(day: date) -> bool:
+    """周一至周五且不在 TRADING_HOLIDAYS 中"""
+    return bool(np.is_busday(np.datetime64(day, "D"), holidays=_HOLIDAYS))
+
+
+def previous_trading_day(day: date) -> date:
+    """day 之前的最近一个交易日"""
+    prev = np.busday_offset(np.datetime64(day, "D"), -1, roll="backward", holidays=_HOLIDAYS)
+    return prev.astype(date)
+
+
+def _round_price(x: np.ndarray) -> np.ndarray:
+    """四舍五入到分（先放大再 floor(x+0.5)，避免二进制误差造成的银行家舍入）"""
+    return np.floor(x * 100 + 0.5 + _EPS) / 100
+
+
+def classify_limits(df: pd.DataFrame, today: Optional[date] = None) -> pd.DataFrame:
+    """全市场涨跌停判定
+
+    df 需含 代码 / 名称 / 最新价 / 昨收 / 最高 / 最低 列。返回以代码为索引的
+    DataFrame：涨停价 / 跌停价 / 涨停 / 跌停 / 炸板（盘中触及涨停后打开）/
+    跌停打开（盘中触及跌停后打开）。无昨收或不设限制的股票各标记均为 False。
+    """
+    today = today or date.today()
+    codes = df["代码"].astype(str)
+    master = security_master.frame(codes)
+    board = master["板块"].to_numpy()
+
+    ratio = np.vectorize(_BOARD_LIMITS.get, otypes=[float])(board)
+    # ST 取主表标记，只有主表之外的代码（如新股）才按名称判断
+    is_st = security_master.st_flags(master, df["名称"] if "名称" in df.columns else None)
+    ratio[is_st & (board == MAIN)] = _ST_LIMIT
+
+    # 新股上市前 5 个交易日无涨跌幅限制
+    list_date = master["上市日期"].to_numpy()
+    listed = list_date > 0
+    no_limit = np.zeros(len(df), dtype=bool)
+    if listed.any():
+        start = pd.to_datetime(list_date[listed].astype(str), format="%Y%m%d",
+                               errors="coerce").to_numpy(dtype="datetime64[D]")
+        days = np.busday_count(start, np.datetime64(today, "D"), holidays=_HOLIDAYS)
+        no_limit[listed] = days < _NEW_LISTING_DAYS
+
+    prev = pd.to_numeric(df["昨收"], errors="coerce").to_numpy(dtype="float64")
+    price = pd.to_numeric(df["最新价"], errors="coerce").to_numpy(dtype="float64")
+    high = pd.to_numeric(df["最高"], errors="coerce").to_numpy(dtype="float64")
+    low = pd.to_numeric(df["最低"], errors="coerce").to_numpy(dtype="float64")
+
+    up_price = _round_price(prev * (1 + ratio))
+    down_price = _round_price(prev * (1 - ratio))
+    valid = (prev > 0) & (price > 0) & ~no_limit
+    with np.errstate(invalid="ignore"):
+        limit_up = valid & (price >= up_price - _EPS)
+        limit_down = valid & (price <= down_price + _EPS)
+        opened_up = valid & ~limit_up & (high >= up_price - _EPS)
+        opened_down = valid & ~limit_down & (low > 0) & (low <= down_price + _EPS)
+
+    return pd.DataFrame({
+        "涨停价": up_price,
+        "跌停价": down_price,
+        "涨停": limit_up,
+        "跌停": limit_down,
+        "炸板": opened_up,
+        "跌停打开": opened_down,
+    }, index=pd.Index(codes.to_numpy(), name="代码"))
+
+
+class LimitHistory:
+    """每日涨停名单的本地存储，线程安全"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_sqlite(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS limit_ups ("
+                " day TEXT, code TEXT, PRIMARY KEY (day, code))",
+            )
+        return self._db
+
+    def record(self, day: date, codes: List[str]) -> None:
+        """覆盖写入某日的涨停名单（同日多次运行以最后一次为准）"""
+        key = day.isoformat()
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("DELETE FROM limit_ups WHERE day = ?", (key,))
+                db.executemany("INSERT INTO limit_ups (day, code) VALUES (?, ?)",
+                               [(key, c) for c in codes])
+                db.execute(
+                    "DELETE FROM limit_ups WHERE day NOT IN ("
+                    " SELECT DISTINCT day FROM limit_ups ORDER BY day DESC LIMIT ?)",
+                    (LIMIT_HISTORY_DAYS,),
+                )
+
+    def prior_days(self, day: date) -> List[Tuple[date, set]]:
+        """day 之前已记录的各交易日及其涨停代码集合（由近到远）"""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT day, code FROM limit_ups WHERE day < ? ORDER BY day DESC",
+                (day.isoformat(),),
+            ).fetchall()
+        days: Dict[str, set] = {}
+        for d, code in rows:
+            days.setdefault(d, set()).add(code)
+        return [(date.fromisoformat(d), codes) for d, codes in days.items()]
+
+    def streaks(self, codes: pd.Index, day: date) -> np.ndarray:
+        """今日涨停代码的连板数（今日计 1，逐个交易日向前累加，
+        未涨停或该交易日没有记录即中断）"""
+        streak = np.ones(len(codes), dtype=np.int32)
+        alive = np.ones(len(codes), dtype=bool)
+        expected = previous_trading_day(day)
+        for recorded, prior in self.prior_days(day):
+            if recorded != expected:
+                break
+            alive &= codes.isin(prior)
+            if not alive.any():
+                break
+            streak += alive
+            expected = previous_trading_day(recorded)
+        return streak
+
+
+limit_history = LimitHistory(cache_path("limit_history.sqlite"))
@@ -8,24 +8,18 @@ import json
 import math
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
+import numpy as np
 import pandas as pd
-import requests
 
-from config import AKSHARE_INTERVAL, TOP_SECTOR, TOP_STOCK
-from models import SectorReport, StockReport
-
-_session = requests.Session()
-_session.trust_env = False
-_session.headers.update({
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Referer": "https://finance.sina.com.cn/",
-    "Accept": "application/json, text/javascript, */*; q=0.01",
-})
+from config import (AKSHARE_INTERVAL, SNAPSHOT_CONCURRENCY, SNAPSHOT_PAGE_SIZE,
+                    SNAPSHOT_RETRIES, TOP_SECTOR, TOP_STOCK)
+from data.limits import classify_limits, is_trading_day, limit_history
+from data.security_master import security_master
+from models import MarketSnapshot, SectorReport, StockReport
+from net import client
 
 
 # ======== 板块 ========
@@ -66,7 +60,7 @@ def _fetch_sector_sina() -> SectorReport:
     """新浪板块数据"""
     report = SectorReport()
 
-    r = _session.get(_INDUSTRY_URL, timeout=15)
+    r = client.get(_INDUSTRY_URL, timeout=15)
     if r.status_code != 200:
         raise RuntimeError(f"新浪行业API返回 {r.status_code}")
     ind = _parse_sector_js(r.text)
@@ -76,9 +70,7 @@ def _fetch_sector_sina() -> SectorReport:
         report.top_losers = ind.tail(TOP_SECTOR).sort_values("涨跌幅").reset_index(drop=True)
         print(f"  -> {len(ind)} 个行业板块 (新浪)")
 
-    time.sleep(0.3)
-
-    r = _session.get(_CONCEPT_URL, params={"param": "class"}, timeout=15)
+    r = client.get(_CONCEPT_URL, params={"param": "class"}, timeout=15)
     if r.status_code == 200:
         con = _parse_sector_js(r.text)
         if not con.empty:
@@ -138,144 +130,170 @@ _STOCK_COUNT_URL = (
 )
 
 
-def _fetch_stocks_sina() -> pd.DataFrame:
-    """新浪排行数据（涨幅TOP + 跌幅TOP + 成交TOP，3次请求）"""
-    all_data = []
-    queries = [
-        ("涨幅", {"sort": "changepercent", "asc": 0}),
-        ("跌幅", {"sort": "changepercent", "asc": 1}),
-        ("成交额", {"sort": "amount", "asc": 0}),
-    ]
-    for label, extra in queries:
-        params = {"page": 1, "num": 200, "node": "hs_a", "_s_r_a": "sart", **extra}
-        r = _session.get(_STOCK_URL, params=params, timeout=15)
-        if r.status_code != 200:
-            raise RuntimeError(f"新浪行情API返回 {r.status_code}")
-        data = json.loads(r.text)
-        all_data.extend(data)
-        time.sleep(0.3)
-
-    # 去重
-    seen = set()
-    unique = []
-    for item in all_data:
-        code = item.get("code", "")
-        if code and code not in seen:
-            seen.add(code)
-            unique.append(item)
-
-    df = pd.DataFrame(unique)
-    for col in ("trade", "changepercent", "pricechange", "open", "high", "low",
-                "settlement", "volume", "amount", "per", "pb", "mktcap", "nmc",
-                "turnoverratio"):
+_SNAPSHOT_NUMERIC = (
+    "trade", "changepercent", "pricechange", "open", "high", "low",
+    "settlement", "volume", "amount", "per", "pb", "mktcap", "nmc",
+    "turnoverratio",
+)
+
+_SNAPSHOT_RENAME = {
+    "code": "代码", "name": "名称", "trade": "最新价",
+    "changepercent": "涨跌幅", "pricechange": "涨跌额",
+    "volume": "成交量", "amount": "成交额",
+    "per": "市盈率-动态", "pb": "市净率",
+    "mktcap": "总市值", "nmc": "流通市值",
+    "turnoverratio": "换手率",
+    "high": "最高", "low": "最低", "open": "今开", "settlement": "昨收",
+}
+
+
+def _retry(fetch, *args):
+    """单个请求失败时单独重试（不影响其他页），重试用尽才抛出"""
+    for attempt in range(SNAPSHOT_RETRIES + 1):
+        try:
+            return fetch(*args)
+        except Exception:
+            if attempt == SNAPSHOT_RETRIES:
+                raise
+            time.sleep(0.5 * (attempt + 1))
+
+
+def _fetch_snapshot_count() -> tuple:
+    """全A股票总数，返回 (总数, 字节数)"""
+    r = client.get(_STOCK_COUNT_URL, params={"node": "hs_a"}, timeout=10)
+    if r.status_code != 200:
+        raise RuntimeError(f"新浪计数API返回 {r.status_code}")
+    return int(json.loads(r.text)), len(r.content)
+
+
+def _fetch_snapshot_page(page: int):
+    """拉取全A快照的一页，返回 (记录列表, 字节数)"""
+    params = {
+        "page": page, "num": SNAPSHOT_PAGE_SIZE, "node": "hs_a",
+        "sort": "symbol", "asc": 1, "_s_r_a": "page",
+    }
+    r = client.get(_STOCK_URL, params=params, timeout=15)
+    if r.status_code != 200:
+        raise RuntimeError(f"新浪行情API返回 {r.status_code}")
+    return json.loads(r.text) or [], len(r.content)
+
+
+def _fetch_snapshot_sina() -> MarketSnapshot:
+    """新浪全A快照：按总数规划页数，有界并发翻页，每页各自重试"""
+    t0 = time.perf_counter()
+    total, nbytes = _retry(_fetch_snapshot_count)
+    pages = max(1, math.ceil(total / SNAPSHOT_PAGE_SIZE))
+
+    records = []
+    with ThreadPoolExecutor(max_workers=SNAPSHOT_CONCURRENCY) as pool:
+        # map 保持页序，结果按代码有序
+        for rows, size in pool.map(lambda p: _retry(_fetch_snapshot_page, p),
+                                   range(1, pages + 1)):
+            records.extend(rows)
+            nbytes += size
+
+    df = pd.DataFrame.from_records(records)
+    if df.empty:
+        raise RuntimeError("新浪全A快照无数据")
+    df = df.drop_duplicates("code")
+    for col in _SNAPSHOT_NUMERIC:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    df = df.rename(columns={
-        "code": "代码", "name": "名称", "trade": "最新价",
-        "changepercent": "涨跌幅", "pricechange": "涨跌额",
-        "volume": "成交量", "amount": "成交额",
-        "per": "市盈率-动态", "pb": "市净率",
-        "mktcap": "总市值", "nmc": "流通市值",
-        "turnoverratio": "换手率",
-        "high": "最高", "low": "最低", "open": "今开", "settlement": "昨收",
-    })
-    return df
-
-
-def _fetch_stocks_akshare() -> pd.DataFrame:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    df = df.rename(columns=_SNAPSHOT_RENAME)
+    df["代码"] = df["代码"].astype(str)
+    df["名称"] = df["名称"].astype(str)
+    df = df.reset_index(drop=True)
+
+    return MarketSnapshot(
+        df=df, source="新浪", pages=pages + 1, bytes=nbytes,
+        elapsed=time.perf_counter() - t0,
+    )
+
+
+def _fetch_snapshot_akshare() -> MarketSnapshot:
     """AKShare 全A行情（需 push2 可达）"""
     import akshare as ak
+    t0 = time.perf_counter()
     df = ak.stock_zh_a_spot_em()
     time.sleep(AKSHARE_INTERVAL)
-    return df
+    df["代码"] = df["代码"].astype(str)
+    return MarketSnapshot(df=df, source="AKShare", pages=1,
+                          elapsed=time.perf_counter() - t0)
 
 
-def _fetch_breadth_sina():
-    """通过新浪 count API 查询涨跌家数"""
+def fetch_market_snapshot() -> MarketSnapshot:
+    """获取全A快照（一次拉取，下游共用；自动选源）"""
+    try:
+        return _fetch_snapshot_sina()
+    except Exception as e:
+        print(f"  新浪行情失败({e.__class__.__name__})，尝试AKShare...")
     try:
-        r = _session.get(_STOCK_COUNT_URL, params={"node": "hs_a"}, timeout=10)
-        if r.status_code != 200:
-            return 0, 0, 0
-        total = int(json.loads(r.text))
-        time.sleep(0.3)
-
-        # 取中位数附近的股票判断涨跌比
-        mid = total // 2
-        params = {
-            "page": mid, "num": 1, "sort": "changepercent", "asc": 0,
-            "node": "hs_a", "_s_r_a": "sart",
-        }
-        r = _session.get(_STOCK_URL, params=params, timeout=10)
-        if r.status_code != 200:
-            return 0, 0, 0
-        data = json.loads(r.text)
-        if data:
-            mid_chg = float(data[0].get("changepercent", 0))
-            flat = total // 50
-            if mid_chg > 0.1:
-                up = int(total * 0.65)
-            elif mid_chg > 0:
-                up = int(total * 0.55)
-            elif mid_chg < -0.1:
-                up = int(total * 0.35)
-            elif mid_chg < 0:
-                up = int(total * 0.45)
-            else:
-                up = total // 2
-            return up, total - up - flat, flat
-    except Exception:
-        pass
-    return 0, 0, 0
+        return _fetch_snapshot_akshare()
+    except Exception as e:
+        print(f"  AKShare也失败: {e.__class__.__name__}")
+        raise RuntimeError("所有行情数据源均不可用") from e
 
 
 def fetch_stock_report() -> StockReport:
-    """获取个股涨跌/成交排行 + 涨跌统计"""
+    """获取个股涨跌/成交排行 + 涨跌统计（均由同一份全A快照计算）"""
     print("[个股] 获取全A股实时行情...")
     report = StockReport()
 
-    # 尝试获取行情数据
-    df = None
-    source = ""
-    try:
-        df = _fetch_stocks_sina()
-        source = "新浪"
-    except Exception as e:
-        print(f"  新浪行情失败({e.__class__.__name__})，尝试AKShare...")
-        try:
-            df = _fetch_stocks_akshare()
-            source = "AKShare"
-        except Exception as e2:
-            print(f"  AKShare也失败: {e2.__class__.__name__}")
-            raise RuntimeError("所有行情数据源均不可用") from e2
+    snap = fetch_market_snapshot()
+    report.snapshot = snap.df
 
     # 清洗
-    df = df[df["最新价"].notna() & (df["最新价"] > 0)].copy()
-    df = df[~df["名称"].str.contains("ST", na=False, regex=False)]
-    df = df[~df["代码"].astype(str).str.startswith("8")]
+    df = snap.df
+    df = df[df["最新价"].notna() & (df["最新价"] > 0)]
+
+    # 涨跌家数（全市场精确统计）
+    chg = df["涨跌幅"].to_numpy(dtype="float64", na_value=0.0)
+    report.up_count = int((chg > 0).sum())
+    report.down_count = int((chg < 0).sum())
+    report.flat_count = int((chg == 0).sum())
+
+    # 排行剔除 ST 和北交所
+    mask = security_master.ranking_mask(df["代码"], df["名称"])
+    ranked = df[mask]
 
     # 涨跌TOP
-    sorted_chg = df.sort_values("涨跌幅", ascending=False)
-    report.top_gainers = sorted_chg.head(TOP_STOCK).reset_index(drop=True)
-    report.top_losers = sorted_chg.tail(TOP_STOCK).sort_values("涨跌幅").reset_index(drop=True)
+    report.top_gainers = ranked.nlargest(TOP_STOCK, "涨跌幅").reset_index(drop=True)
+    report.top_losers = ranked.nsmallest(TOP_STOCK, "涨跌幅").reset_index(drop=True)
 
     # 成交额TOP
-    report.top_volume = df.sort_values("成交额", ascending=False).head(TOP_STOCK).reset_index(drop=True)
+    report.top_volume = ranked.nlargest(TOP_STOCK, "成交额").reset_index(drop=True)
 
-    # 涨跌停统计
-    report.limit_up_count = int((df["涨跌幅"] >= 9.9).sum())
-    report.limit_down_count = int((df["涨跌幅"] <= -9.9).sum())
-
-    # 涨跌家数
-    if source == "新浪":
-        report.up_count, report.down_count, report.flat_count = _fetch_breadth_sina()
-    else:
-        report.up_count = int((df["涨跌幅"] > 0).sum())
-        report.down_count = int((df["涨跌幅"] < 0).sum())
-        report.flat_count = int((df["涨跌幅"] == 0).sum())
+    # 涨跌停统计（按板块规则判定，全市场）
+    _classify_limits(report, df)
 
     total = report.up_count + report.down_count + report.flat_count
-    if total == 0:
-        total = len(df)
-    print(f"  -> {total} 只({source}) | 涨:{report.up_count} 跌:{report.down_count} "
-          f"涨停:{report.limit_up_count} 跌停:{report.limit_down_count}")
+    kb = snap.bytes / 1024
+    print(f"  -> {total} 只({snap.source}, {snap.pages}页 {kb:.0f}KB {snap.elapsed:.1f}s) | "
+          f"涨:{report.up_count} 跌:{report.down_count} "
+          f"涨停:{report.limit_up_count} 跌停:{report.limit_down_count} "
+          f"炸板:{report.limit_opened_count}")
     return report
+
+
+def _classify_limits(report: StockReport, df: pd.DataFrame) -> None:
+    """涨跌停 / 炸板判定 + 连板数，并记录今日涨停名单"""
+    if not {"昨收", "最高", "最低"}.issubset(df.columns):
+        chg = df["涨跌幅"].to_numpy(dtype="float64", na_value=0.0)
+        report.limit_up_count = int((chg >= 9.9).sum())
+        report.limit_down_count = int((chg <= -9.9).sum())
+        return
+
+    today = date.today()
+    limits = classify_limits(df, today)
+    up = limits["涨停"].to_numpy()
+    up_codes = limits.index[up]
+    if is_trading_day(today):
+        limit_history.record(today, up_codes.tolist())
+    streak = np.zeros(len(limits), dtype=np.int32)
+    streak[up] = limit_history.streaks(up_codes, today)
+    limits["连板"] = streak
+
+    report.limits = limits
+    report.limit_up_count = int(up.sum())
+    report.limit_down_count = int(limits["跌停"].sum())
+    report.limit_opened_count = int(limits["炸板"].sum())
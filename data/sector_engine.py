@@ -0,0 +1,284 @@
+"""本地板块聚合 — 板块成分映射 + 全A快照一次向量化汇总所有板块
+
+成分映射（板块 → 成分股）每日从 push2 全A列表的 f100(行业) / f103(概念)
+字段构建一次，板块按 (类型, 名称) 区分（同名的行业与概念各自独立），以 (代码下标, 板块下标) 数组对保存为
+CACHE_DIR/sector_membership.npz，与证券主表一样由定时调度在开盘前后台重建
+（可取消）或用 --refresh-cache 前台重建。聚合时把快照按代码对齐到
+成分对上，用 np.bincount 一次算出所有行业、概念板块的涨跌幅（成交额加权 /
+等权）、涨跌家数、涨跌停数、主力净流入合计和领涨股，不再按板块请求。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import SECTOR_MEMBERSHIP_PAGE_SIZE, SECTOR_MEMBERSHIP_WORKERS
+from data.security_master import BuildCancelled
+from net import client
+from storage import cache_path
+
+_PUSH2_URL = "https://push2.eastmoney.com/api/qt/clist/get"
+_ALL_A = "m:0+t:6,m:0+t:80,m:1+t:2,m:1+t:23,m:0+t:81+s:2048"
+
+INDUSTRY, CONCEPT = 0, 1
+KIND_NAMES = ("行业", "概念")
+
+
+class SectorMembership:
+    """板块成分映射（数组存储），线程安全"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._refreshing: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.built: Optional[date] = None
+        self._set_arrays(np.array([], dtype="<U6"), np.array([], dtype="<U32"),
+                         np.array([], dtype=np.uint8),
+                         np.array([], dtype=np.int32), np.array([], dtype=np.int32))
+
+    def _set_arrays(self, codes, boards, kinds, pair_code, pair_board) -> None:
+        self.codes = codes            # 成分股代码
+        self.boards = boards          # 板块名
+        self.kinds = kinds            # 板块类型 INDUSTRY / CONCEPT
+        self.pair_code = pair_code    # 成分对：代码下标
+        self.pair_board = pair_board  # 成分对：板块下标
+        self._board_index: Dict[Tuple[int, str], int] = {
+            (int(k), b): i for i, (k, b) in enumerate(zip(kinds.tolist(), boards.tolist()))
+        }
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                try:
+                    with np.load(self.path) as f:
+                        self._set_arrays(f["codes"], f["boards"], f["kinds"],
+                                         f["pair_code"], f["pair_board"])
+                        self.built = date.fromordinal(int(f["built"]))
+                except Exception as e:
+                    print(f"[板块映射] 读取失败: {e}")
+            self._loaded = True
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.boards)
+
+    def members(self, board: str, kind: Optional[int] = None) -> List[str]:
+        """板块的成分股代码；不指定 kind 时同名的行业、概念板块合并"""
+        self._ensure_loaded()
+        kinds = (INDUSTRY, CONCEPT) if kind is None else (kind,)
+        ids = [self._board_index[(k, board)] for k in kinds if (k, board) in self._board_index]
+        if not ids:
+            return []
+        rows = self.pair_code[np.isin(self.pair_board, ids)]
+        return self.codes[np.unique(rows)].tolist()
+
+    # ── 构建 ──
+
+    def stale(self) -> bool:
+        self._ensure_loaded()
+        return self.built != date.today()
+
+    def _page(self, page: int) -> dict:
+        """取一页；已取消则不再发请求"""
+        if self._stop.is_set():
+            raise BuildCancelled("板块映射重建已取消")
+        return _fetch_page(page)
+
+    def build(self) -> int:
+        """从 push2 全A列表重建成分映射并写盘，返回板块数
+
+        cancel_refresh() 后尚未发出的分页请求不再发送，抛出 BuildCancelled。
+        """
+        t0 = time.perf_counter()
+        first = self._page(1)
+        pages = max(1, math.ceil(int(first.get("total") or 0) / SECTOR_MEMBERSHIP_PAGE_SIZE))
+        pool = self._pool = ThreadPoolExecutor(max_workers=SECTOR_MEMBERSHIP_WORKERS)
+        try:
+            rest = list(pool.map(self._page, range(2, pages + 1)))
+        except CancelledError:
+            raise BuildCancelled("板块映射重建已取消") from None
+        finally:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        codes: Dict[str, int] = {}
+        boards: Dict[Tuple[int, str], int] = {}
+        pair_code, pair_board = [], []
+        for page in [first, *rest]:
+            for d in page.get("diff") or []:
+                code = str(d.get("f12", ""))
+                if not code or code in codes:
+                    continue
+                ci = codes[code] = len(codes)
+                names = [(INDUSTRY, d.get("f100"))]
+                names += [(CONCEPT, c) for c in str(d.get("f103") or "").split(",")]
+                for kind, name in names:
+                    name = str(name or "").strip()
+                    if not name or name == "-":
+                        continue
+                    bi = boards.get((kind, name))
+                    if bi is None:
+                        bi = boards[(kind, name)] = len(boards)
+                    pair_code.append(ci)
+                    pair_board.append(bi)
+        if not boards:
+            raise RuntimeError("push2 板块成分无数据")
+
+        arrays = dict(
+            codes=np.array(list(codes), dtype="<U6"),
+            boards=np.array([name for _, name in boards], dtype="<U32"),
+            kinds=np.array([kind for kind, _ in boards], dtype=np.uint8),
+            pair_code=np.array(pair_code, dtype=np.int32),
+            pair_board=np.array(pair_board, dtype=np.int32),
+        )
+        built = date.today()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, built=np.int64(built.toordinal()), **arrays)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._set_arrays(**arrays)
+            self.built = built
+            self._loaded = True
+        print(f"[板块映射] 重建完成: {len(boards)} 个板块 / {len(pair_code)} 条成分 "
+              f"({time.perf_counter() - t0:.1f}s)")
+        return len(boards)
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """映射不是今天构建的则在后台线程重建"""
+        if not self.stale():
+            return None
+        if self._refreshing is not None and self._refreshing.is_alive():
+            return None
+        self._stop.clear()
+
+        def _run():
+            try:
+                self.build()
+            except BuildCancelled:
+                print("[板块映射] 后台重建已取消")
+            except Exception as e:
+                print(f"[板块映射] 后台重建失败: {e}")
+
+        t = threading.Thread(target=_run, name="sector-membership-build", daemon=True)
+        t.start()
+        self._refreshing = t
+        return t
+
+    def cancel_refresh(self) -> None:
+        """取消后台重建：排队的分页请求直接丢弃，进程退出不必等它们"""
+        self._stop.set()
+        pool = self._pool
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _fetch_page(page: int) -> dict:
+    params = {
+        "pn": page, "pz": SECTOR_MEMBERSHIP_PAGE_SIZE, "po": 0, "np": 1,
+        "ut": "b2884a393a59ad64002292a3e90d46a5",
+        "fltt": 2, "invt": 2, "fid": "f12",
+        "fs": _ALL_A,
+        "fields": "f12,f100,f103",
+    }
+    data = client.get_json(_PUSH2_URL, params=params, timeout=10)
+    return data.get("data") or {}
+
+
+# ───────── 聚合 ─────────
+
+def aggregate_sectors(snapshot: pd.DataFrame, membership: "SectorMembership",
+                      limits: Optional[pd.DataFrame] = None,
+                      flow: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """一次向量化汇总全部板块
+
+    snapshot: 全A快照（代码 / 名称 / 涨跌幅 / 成交额）
+    limits:   classify_limits() 结果（以代码为索引），提供涨停 / 跌停标记
+    flow:     全市场资金流（以代码为索引），提供主力净流入
+    返回以板块名为索引的 DataFrame（同名的行业、概念各占一行，以 类型 列区分），
+    按成交额加权涨跌幅降序。
+    """
+    membership._ensure_loaded()
+    n_boards = len(membership.boards)
+    if not n_boards or snapshot is None or snapshot.empty:
+        return pd.DataFrame()
+
+    snap = snapshot.drop_duplicates("代码")
+    snap_codes = pd.Index(snap["代码"].astype(str))
+    rows = snap_codes.get_indexer(membership.codes)[membership.pair_code]
+    keep = rows >= 0
+    if not keep.any():
+        return pd.DataFrame()
+    rows = rows[keep]
+    board = membership.pair_board[keep]
+
+    chg = pd.to_numeric(snap["涨跌幅"], errors="coerce").to_numpy(dtype="float64")[rows]
+    amount = pd.to_numeric(snap["成交额"], errors="coerce").to_numpy(dtype="float64")[rows]
+    valid = ~np.isnan(chg)
+    chg0 = np.where(valid, chg, 0.0)
+    amount0 = np.where(valid & ~np.isnan(amount), amount, 0.0)
+
+    def total(weights) -> np.ndarray:
+        return np.bincount(board, weights=weights, minlength=n_boards)
+
+    count = total(valid.astype(np.float64))
+    amount_sum = total(amount0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weighted = total(chg0 * amount0) / amount_sum
+        equal = total(chg0) / count
+
+    stats = {
+        "类型": np.asarray(KIND_NAMES, dtype=object)[membership.kinds],
+        "成分股数": count.astype(np.int64),
+        "涨跌幅": weighted,
+        "等权涨跌幅": equal,
+        "上涨": total((chg0 > 0) & valid).astype(np.int64),
+        "下跌": total((chg0 < 0) & valid).astype(np.int64),
+        "平盘": total((chg0 == 0) & valid).astype(np.int64),
+        "成交额": amount_sum,
+    }
+
+    codes = snap_codes[rows]
+    if limits is not None and not limits.empty:
+        lim = limits.reindex(codes)
+        stats["涨停"] = total(lim["涨停"].fillna(False).to_numpy(dtype=bool)).astype(np.int64)
+        stats["跌停"] = total(lim["跌停"].fillna(False).to_numpy(dtype=bool)).astype(np.int64)
+    if flow is not None and not flow.empty:
+        main_flow = pd.to_numeric(flow["今日主力净流入-净额"], errors="coerce").reindex(codes)
+        stats["主力净流入"] = total(main_flow.fillna(0.0).to_numpy(dtype="float64"))
+
+    # 领涨股：按 (板块, 涨跌幅) 排序后取每个板块的最后一条
+    order = np.lexsort((np.where(valid, chg, -np.inf), board))
+    last = np.flatnonzero(np.r_[board[order][1:] != board[order][:-1], True])
+    leader_rows = order[last]
+    leader_name = np.full(n_boards, "", dtype=object)
+    leader_chg = np.full(n_boards, np.nan)
+    names = snap["名称"].astype(str).to_numpy()[rows]
+    leader_name[board[leader_rows]] = names[leader_rows]
+    leader_chg[board[leader_rows]] = chg[leader_rows]
+    stats["领涨股"] = leader_name
+    stats["领涨股涨跌幅"] = leader_chg
+
+    df = pd.DataFrame(stats, index=pd.Index(membership.boards.tolist(), name="板块"))
+    df = df[df["成分股数"] > 0]
+    return df.sort_values("涨跌幅", ascending=False, na_position="last")
+
+
+sector_membership = SectorMembership(cache_path("sector_membership.npz"))
@@ -0,0 +1,295 @@
+"""证券主表 — 代码 → secid 市场 / 板块 / ST / 上市日期 / 名称
+
+每日按板块从 push2 拉取一次全A列表，以定长 NumPy 数组保存为
+CACHE_DIR/security_master.npz；进程内只加载一次，单只查询走字典 O(1)，
+批量查询走 pd.Index.get_indexer 向量化对齐。重建不在报告路径上：定时调度
+启动时和每个交易日开盘前在后台线程重建（退出时可取消），单次运行用
+--refresh-cache 前台重建；查询不等待网络，主表中没有的代码（如新股）按
+代码前缀规则兜底。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import SECURITY_MASTER_PAGE_SIZE, SECURITY_MASTER_WORKERS
+from net import client
+from storage import cache_path
+
+_PUSH2_URL = "https://push2.eastmoney.com/api/qt/clist/get"
+
+# 板块
+MAIN, CHINEXT, STAR, BSE = 0, 1, 2, 3
+BOARD_NAMES = ("主板", "创业板", "科创板", "北交所")
+
+# (板块, push2 筛选条件)
+_BOARD_FILTERS = (
+    (MAIN, "m:1+t:2"),
+    (MAIN, "m:0+t:6"),
+    (CHINEXT, "m:0+t:80"),
+    (STAR, "m:1+t:23"),
+    (BSE, "m:0+t:81+s:2048"),
+)
+
+_EXCHANGES = {0: "SZ", 1: "SH"}
+
+
+class BuildCancelled(RuntimeError):
+    """后台重建被 cancel_refresh() 取消"""
+
+
+def classify_code(code: str) -> Tuple[int, int]:
+    """按代码前缀推断 (secid 市场, 板块)，仅用于主表中没有的代码"""
+    if code.startswith(("688", "689")):
+        return 1, STAR
+    if code.startswith(("4", "8", "92")):
+        return 0, BSE
+    if code.startswith(("6", "9")):
+        return 1, MAIN
+    if code.startswith(("300", "301", "302")):
+        return 0, CHINEXT
+    return 0, MAIN
+
+
+class SecurityMaster:
+    """全A证券主表（数组存储），线程安全"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._refreshing: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.built: Optional[date] = None
+        self._set_arrays(np.array([], dtype="<U6"), np.array([], dtype="<U16"),
+                         np.array([], dtype=np.uint8), np.array([], dtype=np.uint8),
+                         np.array([], dtype=bool), np.array([], dtype=np.int32))
+
+    def _set_arrays(self, codes, names, market, board, is_st, list_date) -> None:
+        self.codes = codes
+        self.names = names
+        self.market = market
+        self.board = board
+        self.is_st_flags = is_st
+        self.list_date = list_date     # YYYYMMDD，未知为 0
+        self._index = pd.Index(codes)
+        self._rows: Dict[str, int] = {c: i for i, c in enumerate(codes.tolist())}
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                try:
+                    with np.load(self.path) as f:
+                        self._set_arrays(f["codes"], f["names"], f["market"], f["board"],
+                                         f["is_st"], f["list_date"])
+                        self.built = date.fromordinal(int(f["built"]))
+                except Exception as e:
+                    print(f"[主表] 读取失败: {e}")
+            self._loaded = True
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self.codes)
+
+    # ── 单只查询 ──
+
+    def _lookup(self, code: str) -> Tuple[int, int, bool]:
+        self._ensure_loaded()
+        row = self._rows.get(code)
+        if row is None:
+            market, board = classify_code(code)
+            return market, board, False
+        return int(self.market[row]), int(self.board[row]), bool(self.is_st_flags[row])
+
+    def secid(self, code: str) -> str:
+        """东方财富 secid，如 1.600000 / 0.000001"""
+        return f"{self._lookup(code)[0]}.{code}"
+
+    def exchange(self, code: str) -> str:
+        """SH / SZ / BJ"""
+        market, board, _ = self._lookup(code)
+        return "BJ" if board == BSE else _EXCHANGES[market]
+
+    def board_of(self, code: str) -> int:
+        return self._lookup(code)[1]
+
+    def is_st(self, code: str) -> bool:
+        return self._lookup(code)[2]
+
+    # ── 向量查询 ──
+
+    def frame(self, codes) -> pd.DataFrame:
+        """按给定代码顺序对齐的主表列：市场 / 板块 / ST / 上市日期 / 在主表
+
+        主表之外的代码按前缀推断市场和板块，ST 为 False、上市日期为 0。
+        """
+        self._ensure_loaded()
+        codes = pd.Index(pd.Series(codes, dtype="object").astype(str))
+        rows = self._index.get_indexer(codes)
+        found = rows >= 0
+        market = np.zeros(len(codes), dtype=np.uint8)
+        board = np.zeros(len(codes), dtype=np.uint8)
+        is_st = np.zeros(len(codes), dtype=bool)
+        list_date = np.zeros(len(codes), dtype=np.int32)
+        market[found] = self.market[rows[found]]
+        board[found] = self.board[rows[found]]
+        is_st[found] = self.is_st_flags[rows[found]]
+        list_date[found] = self.list_date[rows[found]]
+        for i in np.flatnonzero(~found):
+            market[i], board[i] = classify_code(codes[i])
+        return pd.DataFrame({"市场": market, "板块": board, "ST": is_st,
+                             "上市日期": list_date, "在主表": found}, index=codes)
+
+    def st_flags(self, f: pd.DataFrame, names=None) -> np.ndarray:
+        """frame() 结果的 ST 标记；主表之外的代码给出 names 时按名称判断"""
+        is_st = f["ST"].to_numpy(copy=True)
+        if names is not None:
+            missing = ~f["在主表"].to_numpy()
+            if missing.any():
+                names = pd.Series(names, dtype="object").astype(str).to_numpy()
+                is_st[missing] = ["ST" in n for n in names[missing]]
+        return is_st
+
+    def ranking_mask(self, codes, names=None) -> np.ndarray:
+        """排行用的布尔掩码：剔除 ST 与北交所
+
+        主表之外的代码按前缀判断板块；给出 names 时用名称判断其 ST。
+        """
+        f = self.frame(codes)
+        return ~self.st_flags(f, names) & (f["板块"].to_numpy() != BSE)
+
+    # ── 构建 ──
+
+    def stale(self) -> bool:
+        self._ensure_loaded()
+        return self.built != date.today()
+
+    def _page(self, fs: str, page: int) -> dict:
+        """取一页；已取消则不再发请求"""
+        if self._stop.is_set():
+            raise BuildCancelled("主表重建已取消")
+        return _fetch_page(fs, page)
+
+    def build(self) -> int:
+        """从 push2 拉取全A列表重建主表并写盘，返回证券数
+
+        cancel_refresh() 后尚未发出的分页请求不再发送，抛出 BuildCancelled。
+        """
+        t0 = time.perf_counter()
+        tasks = []
+        firsts = {}
+        for board, fs in _BOARD_FILTERS:
+            first = self._page(fs, 1)
+            firsts[fs] = first
+            pages = max(1, math.ceil(int(first.get("total") or 0) / SECURITY_MASTER_PAGE_SIZE))
+            tasks.extend((board, fs, p) for p in range(2, pages + 1))
+
+        pool = self._pool = ThreadPoolExecutor(max_workers=SECURITY_MASTER_WORKERS)
+        try:
+            rest = list(pool.map(lambda t: self._page(t[1], t[2]), tasks))
+        except CancelledError:
+            raise BuildCancelled("主表重建已取消") from None
+        finally:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        records = []
+        for board, fs in _BOARD_FILTERS:
+            records.extend((board, d) for d in firsts[fs].get("diff") or [])
+        for (board, _, _), page in zip(tasks, rest):
+            records.extend((board, d) for d in page.get("diff") or [])
+        if not records:
+            raise RuntimeError("push2 证券列表无数据")
+
+        seen = {}
+        for board, d in records:
+            code = str(d.get("f12", ""))
+            if code and code not in seen:
+                seen[code] = (board, d)
+        codes = sorted(seen)
+        entries = [seen[c] for c in codes]
+        names = [str(d.get("f14", "")) for _, d in entries]
+        arrays = dict(
+            codes=np.array(codes, dtype="<U6"),
+            names=np.array(names, dtype="<U16"),
+            market=np.array([_int(d.get("f13")) for _, d in entries], dtype=np.uint8),
+            board=np.array([b for b, _ in entries], dtype=np.uint8),
+            is_st=np.array(["ST" in n for n in names], dtype=bool),
+            list_date=np.array([_int(d.get("f26")) for _, d in entries], dtype=np.int32),
+        )
+        built = date.today()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, built=np.int64(built.toordinal()), **arrays)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._set_arrays(**arrays)
+            self.built = built
+            self._loaded = True
+        print(f"[主表] 重建完成: {len(codes)} 只证券 ({time.perf_counter() - t0:.1f}s)")
+        return len(codes)
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """主表不是今天构建的则在后台线程重建"""
+        if not self.stale():
+            return None
+        if self._refreshing is not None and self._refreshing.is_alive():
+            return None
+        self._stop.clear()
+
+        def _run():
+            try:
+                self.build()
+            except BuildCancelled:
+                print("[主表] 后台重建已取消")
+            except Exception as e:
+                print(f"[主表] 后台重建失败: {e}")
+
+        t = threading.Thread(target=_run, name="security-master-build", daemon=True)
+        t.start()
+        self._refreshing = t
+        return t
+
+    def cancel_refresh(self) -> None:
+        """取消后台重建：排队的分页请求直接丢弃，进程退出不必等它们"""
+        self._stop.set()
+        pool = self._pool
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _fetch_page(fs: str, page: int) -> dict:
+    params = {
+        "pn": page, "pz": SECURITY_MASTER_PAGE_SIZE, "po": 0, "np": 1,
+        "ut": "b2884a393a59ad64002292a3e90d46a5",
+        "fltt": 2, "invt": 2, "fid": "f12",
+        "fs": fs,
+        "fields": "f12,f13,f14,f26",
+    }
+    data = client.get_json(_PUSH2_URL, params=params, timeout=10)
+    return data.get("data") or {}
+
+
+security_master = SecurityMaster(cache_path("security_master.npz"))
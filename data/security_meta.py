@@ -0,0 +1,232 @@
+"""个股元数据库 — 代码 → 交易所 / EM2016 关键词 / 所属行业(sshy) / ST 标记
+
+SQLite (WAL) 持久化在 CACHE_DIR 下。原因分析只补齐缺失或过期的代码，
+datacenter-web 按 50 只一批、F10 按单只并发拉取；过期条目可在后台线程增量刷新。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from config import SECURITY_META_MAX_AGE, SECURITY_META_WORKERS
+from data.security_master import security_master
+from net import client
+from storage import cache_path, open_sqlite
+
+_DATACENTER_URL = "https://datacenter-web.eastmoney.com/api/data/v1/get"
+_F10_URL = (
+    "https://emweb.securities.eastmoney.com/PC_HSF10/"
+    "CompanySurvey/CompanySurveyAjax"
+)
+_BATCH = 50  # datacenter-web 单次查询上限
+
+
+class SecurityMetaStore:
+    """个股元数据的本地存储，线程安全"""
+
+    def __init__(self, path: str, max_age: float = SECURITY_META_MAX_AGE) -> None:
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._refreshing: Optional[threading.Thread] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_sqlite(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS securities ("
+                " code TEXT PRIMARY KEY, exchange TEXT, name TEXT,"
+                " keywords TEXT, industry TEXT, is_st INTEGER, updated REAL)",
+                "synchronous=NORMAL",
+            )
+        return self._db
+
+    # ── 读取 ──
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, dict]:
+        """{代码: {"交易所", "名称", "行业", "概念", "ST", "updated"}}"""
+        codes = [str(c) for c in codes]
+        if not codes:
+            return {}
+        result = {}
+        with self._lock:
+            db = self._conn()
+            for i in range(0, len(codes), 500):
+                chunk = codes[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = db.execute(
+                    "SELECT code, exchange, name, keywords, industry, is_st, updated "
+                    f"FROM securities WHERE code IN ({marks})", chunk,
+                ).fetchall()
+                for code, exch, name, kw, industry, is_st, updated in rows:
+                    result[code] = {
+                        "交易所": exch,
+                        "名称": name or "",
+                        "行业": industry or "",
+                        "概念": json.loads(kw) if kw else [],
+                        "ST": bool(is_st),
+                        "updated": updated,
+                    }
+        return result
+
+    def stale_codes(self, codes: Iterable[str]) -> List[str]:
+        """缺失或超过 max_age 的代码"""
+        codes = [str(c) for c in codes]
+        known = self.get_many(codes)
+        cutoff = time.time() - self.max_age
+        return [c for c in codes if c not in known or known[c]["updated"] < cutoff]
+
+    def oldest_codes(self, limit: int) -> List[str]:
+        """库中最久未刷新的已过期代码"""
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT code FROM securities WHERE updated < ? ORDER BY updated LIMIT ?",
+                (cutoff, limit),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    # ── 写入 ──
+
+    def upsert_many(self, entries: Dict[str, dict]) -> None:
+        now = time.time()
+        rows = [
+            (code, e.get("交易所") or security_master.exchange(code), e.get("名称", ""),
+             json.dumps(e.get("概念", []), ensure_ascii=False),
+             e.get("行业", ""), int(bool(e.get("ST"))), now)
+            for code, e in entries.items()
+        ]
+        with self._lock:
+            db = self._conn()
+            db.executemany(
+                "INSERT OR REPLACE INTO securities "
+                "(code, exchange, name, keywords, industry, is_st, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            db.commit()
+
+    # ── 拉取 ──
+
+    def refresh(self, codes: Iterable[str]) -> int:
+        """拉取并写入给定代码的元数据，返回写入条数
+
+        只写入两个接口都成功应答的代码；请求失败（超时、限流等）的代码不落库，
+        下次仍按缺失/过期重新查询。
+        """
+        codes = sorted({str(c) for c in codes})
+        if not codes:
+            return 0
+        entries = {c: {"交易所": security_master.exchange(c), "行业": "", "概念": []} for c in codes}
+        failed = set()
+        batches = [codes[i:i + _BATCH] for i in range(0, len(codes), _BATCH)]
+        with ThreadPoolExecutor(max_workers=SECURITY_META_WORKERS) as pool:
+            for batch, rows in zip(batches, pool.map(_attempt(_fetch_em2016), batches)):
+                if rows is None:
+                    failed.update(batch)
+                    continue
+                for code, info in rows.items():
+                    if code in entries:
+                        entries[code].update(info)
+            for code, sshy in zip(codes, pool.map(_attempt(_fetch_sshy), codes)):
+                if sshy is None:
+                    failed.add(code)
+                elif sshy:
+                    entries[code]["行业"] = sshy
+        if failed:
+            print(f"[元数据] {len(failed)}/{len(codes)} 只获取失败，下次重试")
+        # 成功应答但查不到信息的代码也落库，避免每次运行重复查询
+        answered = {c: e for c, e in entries.items() if c not in failed}
+        if answered:
+            self.upsert_many(answered)
+        return len(answered)
+
+    def ensure(self, codes: Iterable[str]) -> Dict[str, dict]:
+        """补齐缺失/过期代码后返回全部元数据"""
+        codes = [str(c) for c in codes]
+        stale = self.stale_codes(codes)
+        if stale:
+            self.refresh(stale)
+        return self.get_many(codes)
+
+    def refresh_in_background(self, codes: Optional[Iterable[str]] = None,
+                              limit: int = 200) -> Optional[threading.Thread]:
+        """后台线程增量刷新（默认刷新库中最久未更新的过期条目）"""
+        if self._refreshing is not None and self._refreshing.is_alive():
+            return None
+        targets = list(codes) if codes is not None else self.oldest_codes(limit)
+        if not targets:
+            return None
+
+        def _run():
+            try:
+                self.refresh(targets)
+            except Exception as e:
+                print(f"[元数据] 后台刷新失败: {e}")
+
+        t = threading.Thread(target=_run, name="security-meta-refresh", daemon=True)
+        t.start()
+        self._refreshing = t
+        return t
+
+
+def _attempt(fetch):
+    """包装拉取函数：请求失败返回 None，与“成功但无数据”区分"""
+    def run(arg):
+        try:
+            return fetch(arg)
+        except Exception:
+            return None
+    return run
+
+
+def _em2016_answered(data: dict) -> bool:
+    """查询成功或查无数据 (success=false、code=9201) 才算应答；其余失败（限流等）不缓存"""
+    return bool(data.get("success", True)) or data.get("code") == 9201
+
+
+def _fetch_em2016(codes: List[str]) -> Dict[str, dict]:
+    """datacenter-web 批量获取 EM2016 行业分类（请求失败抛出异常）"""
+    result = {}
+    filter_str = '(SECURITY_CODE in ("' + '","'.join(codes) + '"))'
+    data = client.get_json(
+        _DATACENTER_URL,
+        params={
+            "reportName": "RPT_F10_BASIC_ORGINFO",
+            "columns": "SECURITY_CODE,SECURITY_NAME_ABBR,EM2016",
+            "filter": filter_str,
+            "pageSize": _BATCH, "pageNumber": 1,
+        }, timeout=10, cache=True, validate=_em2016_answered,
+    )
+    if not _em2016_answered(data):
+        raise RuntimeError(f"datacenter-web: {data.get('message')}")
+    for item in (data.get("result") or {}).get("data") or []:
+        code = str(item.get("SECURITY_CODE", ""))
+        name = item.get("SECURITY_NAME_ABBR", "") or ""
+        em2016 = item.get("EM2016", "") or ""
+        # EM2016 格式: "电气设备-电源设备-太阳能"
+        keywords = [k.strip() for k in em2016.split("-") if k.strip()]
+        result[code] = {
+            "名称": name,
+            "行业": keywords[-1] if keywords else "",
+            "概念": keywords,
+            "ST": "ST" in name,
+        }
+    return result
+
+
+def _fetch_sshy(code: str) -> str:
+    """F10 公司概况获取精确的 EM 板块名 (sshy)（请求失败抛出异常）"""
+    data = client.get_json(
+        _F10_URL, params={"code": f"{security_master.exchange(code)}{code}"},
+        timeout=8, cache=True, validate=lambda d: "jbzl" in d,
+    )
+    return (data.get("jbzl") or {}).get("sshy", "") or ""
+
+
+meta_store = SecurityMetaStore(cache_path("security_meta.sqlite"))
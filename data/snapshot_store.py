@@ -0,0 +1,232 @@
+"""列式快照库 — 每次运行抓取的 DataFrame 按 日期 / 场次 / 数据集 落盘
+
+文件为 zstd 压缩的 Arrow IPC（Feather v2），路径
+ARCHIVE_DIR/snapshots/date=YYYY-MM-DD/session=morning/<数据集>.arrow；
+manifest.sqlite 记录每个文件的行数和列名。读取时先查清单筛出日期范围内
+的文件，再以内存映射方式只读取请求的列，不必重新抓取即可回看历史。
+pyarrow 为可选依赖，未安装时跳过写入并提示。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from config import SNAPSHOT_COMPRESSION
+from storage import archive_path, open_sqlite
+
+# infer_dtype 结果中 Arrow 能直接转换的类型，其余（混合类型）转成字符串
+_ARROW_SAFE = {"string", "empty", "boolean", "integer", "floating", "decimal",
+               "datetime", "datetime64", "date", "timedelta", "timedelta64"}
+
+
+def _arrow():
+    """按需导入 pyarrow，未安装返回 None"""
+    try:
+        import pyarrow
+        import pyarrow.feather
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """非默认索引（代码、板块名等）转为普通列；混合类型的 object 列转成字符串"""
+    if isinstance(df.index, pd.RangeIndex) and df.index.name is None:
+        df = df.reset_index(drop=True)
+    else:
+        df = df.reset_index()
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True) not in _ARROW_SAFE:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def report_frames(report) -> Dict[str, pd.DataFrame]:
+    """MarketReport 中需要归档的全部 DataFrame，{数据集名: DataFrame}"""
+    frames: Dict[str, Optional[pd.DataFrame]] = {}
+    if report.stock is not None:
+        frames.update({
+            "snapshot": report.stock.snapshot,
+            "limits": report.stock.limits,
+            "stock_top_gainers": report.stock.top_gainers,
+            "stock_top_losers": report.stock.top_losers,
+            "stock_top_volume": report.stock.top_volume,
+        })
+    if report.sector is not None:
+        frames.update({
+            "sector_top_gainers": report.sector.top_gainers,
+            "sector_top_losers": report.sector.top_losers,
+            "concept_gainers": report.sector.concept_gainers,
+            "concept_losers": report.sector.concept_losers,
+        })
+    if report.fund_flow is not None:
+        deltas = report.fund_flow.sector_deltas
+        frames.update({
+            "sector_flow": report.fund_flow.sector_flow,
+            "stock_inflow": report.fund_flow.stock_inflow,
+            "stock_outflow": report.fund_flow.stock_outflow,
+            "flow_universe": report.fund_flow.universe,
+            "sector_deltas": deltas.rename_axis("板块") if deltas is not None else None,
+        })
+    frames["watchlist"] = report.watchlist
+    frames["sector_stats"] = report.sector_stats
+    if report.watch_sectors:
+        stocks = [ws["stocks"].assign(关注板块=ws["name"])
+                  for ws in report.watch_sectors
+                  if isinstance(ws.get("stocks"), pd.DataFrame) and not ws["stocks"].empty]
+        if stocks:
+            frames["watch_sector_stocks"] = pd.concat(stocks, ignore_index=True)
+    return {k: v for k, v in frames.items() if v is not None and not v.empty}
+
+
+class SnapshotStore:
+    """按日期 / 场次分区的列式快照库，线程安全"""
+
+    def __init__(self, root: str, compression: Optional[str] = SNAPSHOT_COMPRESSION) -> None:
+        self.root = root
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._warned = False
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_sqlite(
+                os.path.join(self.root, "manifest.sqlite"),
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " day TEXT, session TEXT, dataset TEXT, path TEXT,"
+                " rows INTEGER, columns TEXT, written_at REAL,"
+                " PRIMARY KEY (dataset, day, session))",
+            )
+        return self._db
+
+    def _path(self, day: date, session: str, dataset: str) -> str:
+        return os.path.join(self.root, f"date={day.isoformat()}",
+                            f"session={session}", f"{dataset}.arrow")
+
+    def available(self) -> bool:
+        """pyarrow 是否可用（不可用时只提示一次）"""
+        if _arrow() is not None:
+            return True
+        if not self._warned:
+            print("[快照] 未安装 pyarrow，跳过列式快照归档 (pip install pyarrow)")
+            self._warned = True
+        return False
+
+    # ── 写入 ──
+
+    def write(self, day: date, session: str, dataset: str, df: pd.DataFrame) -> int:
+        """写入一个数据集（同日同场次覆盖），返回行数"""
+        pa = _arrow()
+        table = pa.Table.from_pandas(_normalize(df), preserve_index=False)
+        path = self._path(day, session, dataset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        pa.feather.write_feather(table, tmp, compression=self.compression or "uncompressed")
+        os.replace(tmp, path)
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO snapshots "
+                    "(day, session, dataset, path, rows, columns, written_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (day.isoformat(), session, dataset, os.path.relpath(path, self.root),
+                     table.num_rows, json.dumps(table.column_names, ensure_ascii=False),
+                     time.time()),
+                )
+        return table.num_rows
+
+    def write_report(self, report) -> int:
+        """归档一次运行的全部 DataFrame，单个数据集失败不影响其他，返回写入数据集数"""
+        if not self.available():
+            return 0
+        day = report.generated_at.date()
+        session = report.session or "adhoc"
+        t0 = time.perf_counter()
+        written = 0
+        rows = 0
+        for dataset, df in report_frames(report).items():
+            try:
+                rows += self.write(day, session, dataset, df)
+                written += 1
+            except Exception as e:
+                print(f"  [快照] {dataset} 写入失败: {e.__class__.__name__}: {e}")
+        if written:
+            print(f"[快照] 已归档 {written} 个数据集 / {rows} 行 "
+                  f"({time.perf_counter() - t0:.1f}s)")
+        return written
+
+    # ── 读取 ──
+
+    def entries(self, dataset: str = "", start: Optional[date] = None,
+                end: Optional[date] = None,
+                sessions: Optional[Sequence[str]] = None) -> List[dict]:
+        """清单中符合条件的文件，按日期、写入时间升序"""
+        where, params = [], []
+        if dataset:
+            where.append("dataset = ?")
+            params.append(dataset)
+        if start:
+            where.append("day >= ?")
+            params.append(start.isoformat())
+        if end:
+            where.append("day <= ?")
+            params.append(end.isoformat())
+        if sessions:
+            where.append(f"session IN ({','.join('?' * len(sessions))})")
+            params.extend(sessions)
+        sql = "SELECT day, session, dataset, path, rows, columns FROM snapshots"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY day, written_at, dataset"
+        with self._lock:
+            rows = self._conn().execute(sql, params).fetchall()
+        return [
+            {"day": day, "session": session, "dataset": ds,
+             "path": os.path.join(self.root, path), "rows": n, "columns": json.loads(cols)}
+            for day, session, ds, path, n, cols in rows
+        ]
+
+    def read(self, dataset: str, start: Optional[date] = None, end: Optional[date] = None,
+             columns: Optional[Sequence[str]] = None,
+             sessions: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """读取数据集在日期范围内的全部快照，追加 日期 / 场次 列
+
+        文件以内存映射打开，只读取 columns 指定的列（某天缺少的列为空值）；
+        不指定 columns 读取全部列。
+        """
+        if _arrow() is None:
+            raise RuntimeError("读取列式快照需要 pyarrow")
+        import pyarrow.feather as feather
+
+        frames = []
+        for entry in self.entries(dataset, start, end, sessions):
+            if not os.path.exists(entry["path"]):
+                continue
+            cols = None
+            if columns is not None:
+                cols = [c for c in columns if c in entry["columns"]]
+            table = feather.read_table(entry["path"], columns=cols, memory_map=True)
+            df = table.to_pandas()
+            df.insert(0, "场次", entry["session"])
+            df.insert(0, "日期", entry["day"])
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=["日期", "场次", *(columns or [])])
+        df = pd.concat(frames, ignore_index=True)
+        if columns is not None:
+            df = df.reindex(columns=["日期", "场次", *columns])
+        return df
+
+
+snapshot_store = SnapshotStore(archive_path("snapshots"))
@@ -1,140 +1,161 @@
 """关注板块 — 获取指定板块的整体表现 + 成分股明细"""
 
+import asyncio
+import math
 import time
+from typing import Tuple
 
 import pandas as pd
-import requests
 
-from config import WATCH_SECTORS
+from config import WATCH_SECTOR_PAGE_SIZE, WATCH_SECTORS
+from data.limits import classify_limits
+from net import client
 
 
-_session = requests.Session()
-_session.trust_env = False
-_session.headers.update({
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Referer": "https://data.eastmoney.com/",
-})
-
 _PUSH2_URL = "https://push2.eastmoney.com/api/qt/clist/get"
+_ULIST_URL = "https://push2.eastmoney.com/api/qt/ulist.np/get"
+
+# 成分股 push2 字段 → 列名
+_STOCK_FIELDS = {
+    "f12": "代码", "f14": "名称", "f2": "最新价", "f3": "涨跌幅", "f4": "涨跌额",
+    "f6": "成交额", "f7": "振幅", "f8": "换手率", "f62": "主力净流入",
+    "f184": "主力净流入占比", "f15": "最高", "f16": "最低", "f18": "昨收",
+}
+
 
+def _num(value) -> float:
+    """push2 缺失值为 "-"，按 0 处理"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
 
-def _fetch_sector_overview(bk_code: str) -> dict:
-    """获取板块整体行情 (涨跌幅、成交额、资金流)"""
-    # 直接用板块代码查询，fs=b:BKxxxx+f:!50
+
+async def _fetch_board_quotes(bk_codes) -> dict:
+    """一次 ulist 请求取回全部板块行情 (涨跌幅、成交额、资金流)，返回 {BK代码: overview}"""
     params = {
-        "pn": 1, "pz": 1, "po": 1, "np": 1,
-        "ut": "b2884a393a59ad64002292a3e90d46a5",
-        "fltt": 2, "invt": 2, "fid": "f3",
-        "fs": f"b:{bk_code}+f:!50",
-        "fields": "f12,f14,f2,f3,f4,f6,f62,f184",
-        "_": int(time.time() * 1000),
-    }
-    r = _session.get(_PUSH2_URL, params=params, timeout=10)
-    data = r.json()
-    # 从板块全量列表中按代码匹配
-    total_amount = data.get("data", {}).get("total", 0)
-
-    # 用另一个接口获取板块自身行情
-    quote_url = "https://push2.eastmoney.com/api/qt/stock/get"
-    secid = f"90.{bk_code}"
-    params2 = {
-        "secid": secid,
-        "ut": "b2884a393a59ad64002292a3e90d46a5",
         "fltt": 2, "invt": 2,
-        "fields": "f43,f44,f45,f46,f47,f48,f50,f57,f58,f107,f162,f168,f169,f170,f171,f177,f47,f48",
+        "fields": "f12,f14,f3,f4,f6,f62,f184",
+        "secids": ",".join(f"90.{code}" for code in bk_codes),
+        "ut": "b2884a393a59ad64002292a3e90d46a5",
         "_": int(time.time() * 1000),
     }
-    r2 = _session.get(quote_url, params=params2, timeout=10)
-    d = r2.json().get("data", {})
-    return {
-        "涨跌幅": d.get("f170", 0),
-        "涨跌额": d.get("f169", 0),
-        "成交额": d.get("f48", 0),
-        "主力净流入": 0,
-        "主力净流入占比": 0,
-    }
-
-
-def _fetch_sector_stocks(bk_code: str) -> pd.DataFrame:
-    """获取板块成分股行情（按涨幅降序）"""
+    data = await client.aget_json(_ULIST_URL, params=params, timeout=10)
+    quotes = {}
+    for d in (data.get("data") or {}).get("diff", []) or []:
+        quotes[d.get("f12", "")] = {
+            "涨跌幅": _num(d.get("f3")),
+            "涨跌额": _num(d.get("f4")),
+            "成交额": _num(d.get("f6")),
+            "主力净流入": _num(d.get("f62")),
+            "主力净流入占比": _num(d.get("f184")),
+        }
+    return quotes
+
+
+async def _fetch_stocks_page(bk_code: str, page: int) -> dict:
     params = {
-        "pn": 1, "pz": 100, "po": 1, "np": 1,
+        "pn": page, "pz": WATCH_SECTOR_PAGE_SIZE, "po": 0, "np": 1,
         "ut": "b2884a393a59ad64002292a3e90d46a5",
-        "fltt": 2, "invt": 2, "fid": "f3",
+        "fltt": 2, "invt": 2, "fid": "f12",
         "fs": f"b:{bk_code}",
-        "fields": "f12,f14,f2,f3,f4,f6,f7,f8,f62,f184",
+        "fields": ",".join(_STOCK_FIELDS),
         "_": int(time.time() * 1000),
     }
-    r = _session.get(_PUSH2_URL, params=params, timeout=10)
-    data = r.json()
-    diffs = data.get("data", {}).get("diff", [])
-    if not diffs:
-        return pd.DataFrame()
-
-    rows = []
-    for d in diffs:
-        rows.append({
-            "代码": d.get("f12", ""),
-            "名称": d.get("f14", ""),
-            "最新价": d.get("f2", 0),
-            "涨跌幅": d.get("f3", 0),
-            "涨跌额": d.get("f4", 0),
-            "成交额": d.get("f6", 0),
-            "振幅": d.get("f7", 0),
-            "换手率": d.get("f8", 0),
-            "主力净流入": d.get("f62", 0),
-            "主力净流入占比": d.get("f184", 0),
-        })
-    return pd.DataFrame(rows)
+    data = await client.aget_json(_PUSH2_URL, params=params, timeout=10)
+    return data.get("data") or {}
 
 
-def fetch_watch_sectors() -> list:
+async def _fetch_sector_stocks(bk_code: str) -> Tuple[pd.DataFrame, int]:
+    """获取板块全部成分股行情（按涨幅降序），返回 (DataFrame, 请求页数)
+
+    按代码（不随行情变化）分页，首页的 total 决定总页数，其余页并发请求，
+    合并后在本地按涨跌幅排序。停牌股的 "-" 转为 NaN。
+    """
+    first = await _fetch_stocks_page(bk_code, 1)
+    total = int(first.get("total") or 0)
+    pages = max(1, math.ceil(total / WATCH_SECTOR_PAGE_SIZE))
+    rest = await asyncio.gather(*(_fetch_stocks_page(bk_code, p) for p in range(2, pages + 1)))
+
+    records = []
+    for page in [first, *rest]:
+        records.extend(page.get("diff") or [])
+    if not records:
+        return pd.DataFrame(), pages
+    df = pd.DataFrame.from_records(records, columns=list(_STOCK_FIELDS)).rename(columns=_STOCK_FIELDS)
+    df["代码"] = df["代码"].astype(str)
+    numeric = [c for c in df.columns if c not in ("代码", "名称")]
+    df[numeric] = df[numeric].apply(pd.to_numeric, errors="coerce")
+    df = df.drop_duplicates("代码")
+    df = df.sort_values("涨跌幅", ascending=False, na_position="last", kind="stable")
+    return df.reset_index(drop=True), pages
+
+
+def _sector_overview(quote, stocks: pd.DataFrame) -> dict:
+    """板块概览：批量行情 + 成分股涨跌统计"""
+    overview = dict(quote or {
+        "涨跌幅": 0, "涨跌额": 0, "成交额": 0, "主力净流入": 0, "主力净流入占比": 0,
+    })
+
+    # 板块行情未给出资金流时，用成分股资金流之和
+    if not overview["主力净流入"] and not stocks.empty:
+        overview["主力净流入"] = float(stocks["主力净流入"].sum())
+
+    # 统计
+    up_count = int((stocks["涨跌幅"] > 0).sum()) if not stocks.empty else 0
+    down_count = int((stocks["涨跌幅"] < 0).sum()) if not stocks.empty else 0
+    flat_count = int((stocks["涨跌幅"] == 0).sum()) if not stocks.empty else 0
+    limit_up = int(classify_limits(stocks)["涨停"].sum()) if not stocks.empty else 0
+
+    overview["上涨"] = up_count
+    overview["下跌"] = down_count
+    overview["平盘"] = flat_count
+    overview["涨停"] = limit_up
+    overview["总数"] = len(stocks)
+    return overview
+
+
+async def fetch_watch_sectors() -> list:
     """获取所有关注板块的数据
 
+    板块行情一次批量请求，各板块成分股并发请求。
     返回: [{"name": "证券", "code": "BK0473", "overview": {...}, "stocks": DataFrame}, ...]
     """
     if not WATCH_SECTORS:
         return []
 
+    codes = list(WATCH_SECTORS)
+    print(f"[板块关注] 获取 {len(codes)} 个板块: {'、'.join(WATCH_SECTORS.values())} ...")
+    quotes, *stock_frames = await asyncio.gather(
+        _fetch_board_quotes(codes),
+        *(_fetch_sector_stocks(code) for code in codes),
+        return_exceptions=True,
+    )
+    if isinstance(quotes, Exception):
+        print(f"  板块行情获取失败: {quotes}")
+        quotes = {}
+
     results = []
-    for bk_code, name in WATCH_SECTORS.items():
-        print(f"[板块关注] 获取 {name}({bk_code}) ...")
+    for bk_code, fetched in zip(codes, stock_frames):
+        name = WATCH_SECTORS[bk_code]
+        if isinstance(fetched, Exception):
+            print(f"  {name} 获取失败: {fetched}")
+            continue
+        stocks, pages = fetched
         try:
-            overview = _fetch_sector_overview(bk_code)
-            time.sleep(0.3)
-            stocks = _fetch_sector_stocks(bk_code)
-            time.sleep(0.3)
-
-            # 板块整体资金流 = 成分股资金流之和
-            if not stocks.empty and "主力净流入" in stocks.columns:
-                total_flow = stocks["主力净流入"].sum()
-                overview["主力净流入"] = total_flow
-
-            # 统计
-            up_count = int((stocks["涨跌幅"] > 0).sum()) if not stocks.empty else 0
-            down_count = int((stocks["涨跌幅"] < 0).sum()) if not stocks.empty else 0
-            flat_count = int((stocks["涨跌幅"] == 0).sum()) if not stocks.empty else 0
-            limit_up = int((stocks["涨跌幅"] >= 9.9).sum()) if not stocks.empty else 0
-
-            overview["上涨"] = up_count
-            overview["下跌"] = down_count
-            overview["平盘"] = flat_count
-            overview["涨停"] = limit_up
-            overview["总数"] = len(stocks)
-
-            print(f"  -> {len(stocks)} 只成分股 | 涨:{up_count} 跌:{down_count} 涨停:{limit_up}")
-
-            results.append({
-                "name": name,
-                "code": bk_code,
-                "overview": overview,
-                "stocks": stocks,
-            })
+            overview = _sector_overview(quotes.get(bk_code), stocks)
         except Exception as e:
-            print(f"  {name} 获取失败: {e}")
+            print(f"  {name} 统计失败: {e}")
+            continue
+
+        print(f"  {name}: {len(stocks)} 只成分股({pages}页) | "
+              f"涨:{overview['上涨']} 跌:{overview['下跌']} 涨停:{overview['涨停']}")
+
+        results.append({
+            "name": name,
+            "code": bk_code,
+            "overview": overview,
+            "stocks": stocks,
+        })
 
     return results
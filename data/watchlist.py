@@ -1,105 +1,93 @@
 """自选股行情 + 资金流向"""
 
+import asyncio
 import time
+from typing import Dict, List
 
 import pandas as pd
-import requests
 
-from config import WATCHLIST
+from config import WATCHLIST, WATCHLIST_CHUNK_SIZE, WATCHLIST_RETRIES
+from data.security_master import security_master
+from net import client
 
 
-_session = requests.Session()
-_session.trust_env = False
-_session.headers.update({
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    ),
-    "Referer": "https://finance.sina.com.cn/",
-})
-
 _PUSH2_URL = "https://push2.eastmoney.com/api/qt/ulist.np/get"
-_PUSH2_FLOW_URL = "https://push2.eastmoney.com/api/qt/ulist.np/get"
-
-
-def _code_to_secid(code: str) -> str:
-    """股票代码转东方财富 secid (0.深 / 1.沪)"""
-    if code.startswith(("6", "9")):
-        return f"1.{code}"
-    return f"0.{code}"
 
-
-def fetch_watchlist() -> pd.DataFrame:
+# push2 字段 → 列名
+_QUOTE_FIELDS = {
+    "f12": "代码", "f14": "名称", "f2": "最新价", "f3": "涨跌幅", "f4": "涨跌额",
+    "f5": "成交量(手)", "f6": "成交额", "f7": "振幅", "f8": "换手率",
+    "f9": "市盈率", "f10": "量比", "f15": "最高", "f16": "最低",
+    "f17": "今开", "f18": "昨收",
+}
+_FLOW_FIELDS = {
+    "f12": "代码", "f62": "主力净流入", "f184": "主力净流入占比",
+    "f66": "超大单净流入", "f72": "大单净流入",
+}
+
+
+async def _fetch_chunk(secids: str, fields: str) -> list:
+    """请求一组 secid，失败时单独重试（不影响其他分组）"""
+    params = {
+        "fltt": 2, "invt": 2,
+        "fields": fields,
+        "secids": secids,
+        "ut": "b2884a393a59ad64002292a3e90d46a5",
+    }
+    for attempt in range(WATCHLIST_RETRIES + 1):
+        try:
+            params["_"] = int(time.time() * 1000)
+            data = await client.aget_json(_PUSH2_URL, params=params, timeout=10)
+            return (data.get("data") or {}).get("diff") or []
+        except Exception:
+            if attempt == WATCHLIST_RETRIES:
+                raise
+            await asyncio.sleep(0.5 * (attempt + 1))
+
+
+async def _fetch_table(chunks: List[str], fields: Dict[str, str], label: str) -> pd.DataFrame:
+    """并发请求全部分组，按字段映射构造以代码为索引的 DataFrame"""
+    results = await asyncio.gather(
+        *(_fetch_chunk(secids, ",".join(fields)) for secids in chunks),
+        return_exceptions=True,
+    )
+    records = []
+    failed = 0
+    for result in results:
+        if isinstance(result, Exception):
+            failed += 1
+            continue
+        records.extend(result)
+    if failed:
+        print(f"  [自选] {label} {failed}/{len(chunks)} 组获取失败")
+    df = pd.DataFrame.from_records(records, columns=list(fields)).rename(columns=fields)
+    df["代码"] = df["代码"].astype(str)
+    return df.drop_duplicates("代码").set_index("代码")
+
+
+async def fetch_watchlist() -> pd.DataFrame:
     """获取自选股实时行情 + 资金流向
 
+    secid 按 WATCHLIST_CHUNK_SIZE 分组，行情与资金流的各组并发请求，
+    按代码索引合并；单组失败只缺该组数据。
     返回 DataFrame 含: 代码, 名称, 最新价, 涨跌幅, 涨跌额,
                        成交额, 换手率, 主力净流入, 主力净流入占比
     """
     if not WATCHLIST:
         return pd.DataFrame()
 
-    secids = ",".join(_code_to_secid(c) for c in WATCHLIST)
+    secids = [security_master.secid(c) for c in WATCHLIST]
+    chunks = [",".join(secids[i:i + WATCHLIST_CHUNK_SIZE])
+              for i in range(0, len(secids), WATCHLIST_CHUNK_SIZE)]
 
-    # 行情数据
-    params = {
-        "fltt": 2, "invt": 2,
-        "fields": "f12,f14,f2,f3,f4,f5,f6,f7,f8,f9,f10,f15,f16,f17,f18",
-        "secids": secids,
-        "ut": "b2884a393a59ad64002292a3e90d46a5",
-        "_": int(time.time() * 1000),
-    }
-    r = _session.get(_PUSH2_URL, params=params, timeout=10)
-    data = r.json()
-    diffs = data.get("data", {}).get("diff", [])
-
-    rows = {}
-    for d in diffs:
-        code = d.get("f12", "")
-        rows[code] = {
-            "代码": code,
-            "名称": d.get("f14", ""),
-            "最新价": d.get("f2", 0),
-            "涨跌幅": d.get("f3", 0),
-            "涨跌额": d.get("f4", 0),
-            "成交量(手)": d.get("f5", 0),
-            "成交额": d.get("f6", 0),
-            "振幅": d.get("f7", 0),
-            "换手率": d.get("f8", 0),
-            "市盈率": d.get("f9", 0),
-            "量比": d.get("f10", 0),
-            "最高": d.get("f15", 0),
-            "最低": d.get("f16", 0),
-            "今开": d.get("f17", 0),
-            "昨收": d.get("f18", 0),
-        }
-
-    time.sleep(0.3)
-
-    # 资金流向数据
-    params_flow = {
-        "fltt": 2, "invt": 2,
-        "fields": "f12,f14,f62,f184,f66,f69,f72,f75,f78,f81",
-        "secids": secids,
-        "ut": "b2884a393a59ad64002292a3e90d46a5",
-        "_": int(time.time() * 1000),
-    }
-    try:
-        r = _session.get(_PUSH2_FLOW_URL, params=params_flow, timeout=10)
-        data = r.json()
-        for d in data.get("data", {}).get("diff", []):
-            code = d.get("f12", "")
-            if code in rows:
-                rows[code]["主力净流入"] = d.get("f62", 0)
-                rows[code]["主力净流入占比"] = d.get("f184", 0)
-                rows[code]["超大单净流入"] = d.get("f66", 0)
-                rows[code]["大单净流入"] = d.get("f72", 0)
-    except Exception:
-        pass
-
-    if not rows:
+    quotes, flows = await asyncio.gather(
+        _fetch_table(chunks, _QUOTE_FIELDS, "行情"),
+        _fetch_table(chunks, _FLOW_FIELDS, "资金流"),
+    )
+    if quotes.empty:
         return pd.DataFrame()
 
+    df = quotes.join(flows, how="left")
     # 保持 WATCHLIST 中的顺序
-    ordered = [rows[c] for c in WATCHLIST if c in rows]
-    return pd.DataFrame(ordered)
+    order = [c for c in WATCHLIST if c in df.index]
+    return df.loc[order].rename_axis("代码").reset_index()
@@ -6,29 +6,73 @@ import argparse
 import asyncio
 import os
 import sys
+import threading
+import time
 from datetime import datetime
+from typing import Optional
+
+from net import client
 
 # AKShare 通过 requests 访问国内站点；macOS 系统偏好设置可能配了代理，
-# 导致 requests 自动走代理。这里 monkey-patch Session 禁用 trust_env。
-import requests as _requests
-_OrigSession = _requests.Session
-class _NoProxySession(_OrigSession):
-    def __init__(self, *a, **kw):
-        super().__init__(*a, **kw)
-        self.trust_env = False
-_requests.Session = _NoProxySession
+# 导致 requests 自动走代理。这里让所有请求绕过系统代理。
+client.disable_system_proxy()
 
 from models import MarketReport, NewsReport
 from data.market_data import fetch_sector_report, fetch_stock_report
 from data.fund_flow import fetch_fund_flow
+from data.flow_series import flow_sampler
 from data.watchlist import fetch_watchlist
 from data.watch_sector import fetch_watch_sectors
 from data.reasons import analyze_reasons
+from data.sector_engine import aggregate_sectors, sector_membership
+from data.security_master import security_master
+from data.security_meta import meta_store
+from data.snapshot_store import snapshot_store
 from news.collector import NewsCollector
 from news.matcher import match_news_to_sectors, extract_sector_names
+from pipeline import Pipeline, Stage, StageError
 from report import terminal, markdown
 
 
+_news_collector: Optional[NewsCollector] = None
+
+
+def _get_news_collector() -> NewsCollector:
+    """进程内共享的新闻采集器（连接池跨调度运行复用）"""
+    global _news_collector
+    if _news_collector is None:
+        _news_collector = NewsCollector()
+    return _news_collector
+
+
+def refresh_reference_data(background: bool = True) -> None:
+    """重建过期的证券主表和板块成分映射
+
+    background=True（定时调度）在后台线程重建，查询期间按代码前缀兜底；
+    False（--refresh-cache）前台重建并等待写盘。
+    """
+    for store, label in ((security_master, "主表"), (sector_membership, "板块映射")):
+        if background:
+            store.refresh_in_background()
+            continue
+        try:
+            store.build()
+        except Exception as e:
+            print(f"[{label}] 重建失败: {e}")
+
+
+async def shutdown() -> None:
+    """取消后台重建，停止日内资金流采样，关闭共享的异步客户端"""
+    global _news_collector
+    security_master.cancel_refresh()
+    sector_membership.cancel_refresh()
+    await flow_sampler.stop()
+    if _news_collector is not None:
+        await _news_collector.close()
+        _news_collector = None
+    await client.aclose()
+
+
 def determine_session() -> str:
     """根据当前时间判断上午盘/下午盘"""
     hour = datetime.now().hour
@@ -36,7 +80,11 @@ def determine_session() -> str:
 
 
 async def run_once(skip_news: bool = False) -> None:
-    """执行一次完整的市场分析"""
+    """执行一次完整的市场分析
+
+    各数据阶段按依赖关系并发执行：行情 / 板块 / 资金 / 自选 / 关注板块 / 新闻
+    互不依赖，同时启动；新闻匹配只等板块和新闻采集；原因分析只等它读取的输入。
+    """
     print("=" * 60)
     print(f"  A股投资顾问 — {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("=" * 60)
@@ -46,84 +94,156 @@ async def run_once(skip_news: bool = False) -> None:
         session=determine_session(),
     )
 
-    # 1. 核心行情数据（失败则退出）
-    try:
+    # ── 各阶段（写入 report 对应字段） ──
+
+    def stage_stock():
         report.stock = fetch_stock_report()
-    except Exception as e:
-        print(f"\n[错误] 核心行情数据获取失败，无法生成报告: {e}")
-        sys.exit(1)
 
-    # 2. 板块数据（容错）
-    try:
+    def stage_sector():
         report.sector = fetch_sector_report()
-    except Exception as e:
-        print(f"[警告] 板块数据获取失败: {e}")
 
-    # 3. 资金流向（容错）
-    try:
-        report.fund_flow = fetch_fund_flow()
-    except Exception as e:
-        print(f"[警告] 资金流向获取失败: {e}")
+    async def stage_fund_flow():
+        report.fund_flow = await fetch_fund_flow()
+        deltas = flow_sampler.deltas("sector")
+        if not deltas.empty:
+            report.fund_flow.sector_deltas = deltas
 
-    # 4. 自选股（容错）
-    try:
-        report.watchlist = fetch_watchlist()
+    async def stage_watchlist():
+        report.watchlist = await fetch_watchlist()
         if report.watchlist is not None and not report.watchlist.empty:
             print(f"[自选] 获取到 {len(report.watchlist)} 只自选股行情")
-    except Exception as e:
-        print(f"[警告] 自选股数据获取失败: {e}")
 
-    # 4.5 关注板块（容错）
-    try:
-        report.watch_sectors = fetch_watch_sectors()
-    except Exception as e:
-        print(f"[警告] 关注板块数据获取失败: {e}")
+    async def stage_watch_sectors():
+        report.watch_sectors = await fetch_watch_sectors()
+
+    async def stage_news():
+        collector = _get_news_collector()
+        news_items = await collector.collect()
+        report.news = NewsReport(items=news_items,
+                                 sources=dict(collector.source_stats))
+
+    def stage_news_match():
+        # 关联匹配：新闻 ↔ 涨跌板块
+        if not report.news or not report.sector:
+            return
+        sector_names = []
+        sector_names.extend(extract_sector_names(report.sector.top_gainers))
+        sector_names.extend(extract_sector_names(report.sector.top_losers))
+        sector_names.extend(extract_sector_names(report.sector.concept_gainers))
+        sector_names.extend(extract_sector_names(report.sector.concept_losers))
+        if sector_names:
+            report.news.matched = match_news_to_sectors(report.news.items, sector_names)
+
+    def stage_sector_stats():
+        # 全部行业/概念板块：快照 + 成分映射本地聚合
+        if not report.stock or report.stock.snapshot is None:
+            return
+        universe = report.fund_flow.universe if report.fund_flow else None
+        report.sector_stats = aggregate_sectors(
+            report.stock.snapshot, sector_membership, report.stock.limits, universe,
+        )
+        if not report.sector_stats.empty:
+            print(f"[板块] 本地聚合 {len(report.sector_stats)} 个板块")
+
+    def stage_reasons():
+        report.reasons = analyze_reasons(report)
 
-    # 5. 新闻采集（容错，可跳过）
+    stages = [
+        Stage("stock", stage_stock, critical=True),
+        Stage("sector", stage_sector, error_label="板块数据获取"),
+        Stage("fund_flow", stage_fund_flow, error_label="资金流向获取"),
+        Stage("watchlist", stage_watchlist, error_label="自选股数据获取"),
+        Stage("watch_sectors", stage_watch_sectors, error_label="关注板块数据获取"),
+        Stage("sector_stats", stage_sector_stats, deps=["stock", "fund_flow"],
+              error_label="板块聚合"),
+    ]
+    reason_deps = ["stock", "sector", "fund_flow"]
     if not skip_news:
-        try:
-            async with NewsCollector() as collector:
-                news_items = await collector.collect()
-
-            # 关联匹配：新闻 ↔ 涨跌板块
-            matched = {}
-            if report.sector:
-                sector_names = []
-                sector_names.extend(extract_sector_names(report.sector.top_gainers))
-                sector_names.extend(extract_sector_names(report.sector.top_losers))
-                sector_names.extend(extract_sector_names(report.sector.concept_gainers))
-                sector_names.extend(extract_sector_names(report.sector.concept_losers))
-                if sector_names:
-                    matched = match_news_to_sectors(news_items, sector_names)
-
-            report.news = NewsReport(items=news_items, matched=matched)
-        except Exception as e:
-            print(f"[警告] 新闻采集失败: {e}")
+        stages.append(Stage("news", stage_news, error_label="新闻采集"))
+        stages.append(Stage("news_match", stage_news_match,
+                            deps=["news", "sector"], error_label="新闻匹配"))
+        reason_deps.append("news_match")
     else:
         print("[跳过] 新闻采集 (--no-news)")
+    stages.append(Stage("reasons", stage_reasons,
+                        deps=reason_deps, error_label="原因分析"))
 
-    # 6. 涨跌原因分析（容错）
+    pipeline = Pipeline(stages)
+    t0 = time.perf_counter()
     try:
-        report.reasons = analyze_reasons(report)
-    except Exception as e:
-        print(f"[警告] 原因分析失败: {e}")
+        await pipeline.run()
+    except StageError as e:
+        # 核心行情数据失败则退出
+        print(f"\n[错误] 核心行情数据获取失败，无法生成报告: {e.cause}")
+        sys.exit(1)
 
-    # 7. 输出报告
+    report.timings = pipeline.timings()
+    timing_str = " ".join(f"{k}:{v:.1f}s" for k, v in report.timings.items())
+    print(f"[耗时] 总计 {time.perf_counter() - t0:.1f}s | {timing_str}")
+    stats = client.cache_stats()
+    print(f"[缓存] 命中 {stats['hits']} / 未命中 {stats['misses']}")
+
+    # 输出报告
     terminal.render(report)
     filepath = markdown.save(report)
     print(f"\n[保存] Markdown 报告: {filepath}")
+    await asyncio.to_thread(snapshot_store.write_report, report)
+
+    # 空闲时后台增量刷新过期的个股元数据
+    meta_store.refresh_in_background()
+
+
+async def _run_cli(skip_news: bool = False) -> None:
+    """单次运行：执行后关闭共享客户端
+
+    单次运行不重建证券主表 / 板块成分映射（重建翻页会与本次报告争抢 push2
+    限速），过期时只提示，查询按代码前缀兜底、板块聚合沿用旧映射。
+    """
+    if security_master.stale() or sector_membership.stale():
+        print("[主表] 证券主表 / 板块成分映射不是今天构建的，运行 --refresh-cache 重建")
+    try:
+        await run_once(skip_news=skip_news)
+    finally:
+        await shutdown()
+
+
+async def _scheduled_run() -> None:
+    """调度运行：核心数据失败时 run_once 会 sys.exit，这里拦下等待下次调度"""
+    try:
+        await run_once()
+    except SystemExit:
+        pass
 
 
 def start_scheduler() -> None:
     """启动 APScheduler 定时任务"""
     from apscheduler.schedulers.blocking import BlockingScheduler
     from apscheduler.triggers.cron import CronTrigger
-    from config import SCHEDULE_MORNING, SCHEDULE_AFTERNOON
+    from config import SCHEDULE_MORNING, SCHEDULE_AFTERNOON, SCHEDULE_REFERENCE_REBUILD
 
     scheduler = BlockingScheduler()
+    # 所有运行共用一个常驻事件循环（后台线程）：共享客户端不必每次重建，
+    # 金十快讯轮询和日内资金流采样也在两次报告之间持续运行（各自的连接保持活跃）
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="asyncio-loop", daemon=True).start()
+    asyncio.run_coroutine_threadsafe(_get_news_collector().start_polling(), loop).result()
+    asyncio.run_coroutine_threadsafe(flow_sampler.start(), loop).result()
 
     def job():
-        asyncio.run(run_once())
+        asyncio.run_coroutine_threadsafe(_scheduled_run(), loop).result()
+
+    # 启动时过期则立即后台重建，之后每个交易日开盘前重建一次
+    refresh_reference_data()
+    scheduler.add_job(
+        refresh_reference_data,
+        CronTrigger(
+            day_of_week="mon-fri",
+            hour=SCHEDULE_REFERENCE_REBUILD["hour"],
+            minute=SCHEDULE_REFERENCE_REBUILD["minute"],
+        ),
+        id="reference",
+        name="证券主表 / 板块映射重建",
+    )
 
     # 周一至周五 11:35
     scheduler.add_job(
@@ -160,6 +280,9 @@ def start_scheduler() -> None:
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
         print("\n调度已停止")
+    finally:
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
 
 
 def _build_demo_report() -> MarketReport:
@@ -270,9 +393,12 @@ def main():
     parser.add_argument("--port", type=int, default=8088, help="Web 前端端口 (默认 8088)")
     parser.add_argument("--no-news", action="store_true", help="跳过新闻采集 (快速模式)")
     parser.add_argument("--demo", action="store_true", help="使用模拟数据验证报告渲染")
+    parser.add_argument("--refresh-cache", action="store_true", help="重建证券主表和板块成分映射后退出")
     args = parser.parse_args()
 
-    if args.demo:
+    if args.refresh_cache:
+        refresh_reference_data(background=False)
+    elif args.demo:
         report = _build_demo_report()
         terminal.render(report)
         filepath = markdown.save(report)
@@ -287,7 +413,7 @@ def main():
         print(f"A股投资顾问 Web 前端: http://localhost:{args.port}")
         app.run(host="0.0.0.0", port=args.port, debug=False)
     else:
-        asyncio.run(run_once(skip_news=args.no_news))
+        asyncio.run(_run_cli(skip_news=args.no_news))
 
 
 if __name__ == "__main__":
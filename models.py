@@ -17,6 +17,7 @@ class NewsItem:
     source: str = ""
     content: str = ""
     publish_time: Optional[datetime] = None
+    sources: List[str] = field(default_factory=list)  # 近似重复合并后的全部来源
 
     @property
     def fingerprint(self) -> str:
@@ -32,6 +33,16 @@ class SectorReport:
     concept_losers: pd.DataFrame = field(default_factory=pd.DataFrame)
 
 
+@dataclass
+class MarketSnapshot:
+    """全A股行情快照（一次拉取，下游共用）"""
+    df: pd.DataFrame = field(default_factory=pd.DataFrame)
+    source: str = ""
+    pages: int = 0       # 请求次数
+    bytes: int = 0       # 响应字节数
+    elapsed: float = 0.0  # 耗时(秒)
+
+
 @dataclass
 class StockReport:
     """个股行情摘要"""
@@ -40,9 +51,12 @@ class StockReport:
     top_volume: pd.DataFrame = field(default_factory=pd.DataFrame)
     limit_up_count: int = 0
     limit_down_count: int = 0
+    limit_opened_count: int = 0  # 炸板（盘中触及涨停后打开）
     up_count: int = 0
     down_count: int = 0
     flat_count: int = 0
+    snapshot: Optional[pd.DataFrame] = None  # 全A快照，供下游复用
+    limits: Optional[pd.DataFrame] = None    # 涨跌停判定（以代码为索引，含连板数）
 
 
 @dataclass
@@ -51,6 +65,8 @@ class FundFlowReport:
     sector_flow: pd.DataFrame = field(default_factory=pd.DataFrame)
     stock_inflow: pd.DataFrame = field(default_factory=pd.DataFrame)
     stock_outflow: pd.DataFrame = field(default_factory=pd.DataFrame)
+    universe: Optional[pd.DataFrame] = None  # 全市场个股资金流（以代码为索引）
+    sector_deltas: Optional[pd.DataFrame] = None  # 板块主力净流入日内变化（以板块名为索引）
 
 
 @dataclass
@@ -58,6 +74,7 @@ class NewsReport:
     """新闻采集结果"""
     items: List[NewsItem] = field(default_factory=list)
     matched: dict = field(default_factory=dict)  # {板块名: [相关新闻]}
+    sources: dict = field(default_factory=dict)  # {源: {"status", "latency", "count"}}
 
 
 @dataclass
@@ -71,4 +88,6 @@ class MarketReport:
     news: Optional[NewsReport] = None
     watchlist: Optional[pd.DataFrame] = None
     watch_sectors: Optional[list] = None  # [{name, code, overview, stocks}]
+    sector_stats: Optional[pd.DataFrame] = None  # 本地聚合的全部行业/概念板块统计（以板块名为索引）
     reasons: Optional[dict] = None  # {"stock:300274": "原因", "sector:有色金属": "原因"}
+    timings: Optional[dict] = None  # {阶段名: 耗时秒}
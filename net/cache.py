@@ -0,0 +1,148 @@
+"""接口响应缓存 — 按接口 TTL 过期 + LRU 容量上限，SQLite 持久化
+
+键 = 接口地址 + 规范化参数（排序，剔除时间戳参数 "_"），值为解析后的 JSON。
+内存层保存最近访问的条目，磁盘层跨进程重启保留，上午跑过的元数据
+下午和 Web 触发的刷新可以直接复用。内存层命中的访问时间成批写回磁盘，
+磁盘层按访问时间淘汰时不会误删最常用的条目。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+from config import HTTP_CACHE_MAX_ENTRIES, HTTP_CACHE_TTLS
+from storage import cache_path, open_sqlite
+
+
+def endpoint_name(url: str, params: Optional[dict] = None) -> str:
+    """接口名: datacenter 报表取 reportName，其余取 URL 最后一段路径"""
+    if params and params.get("reportName"):
+        return str(params["reportName"])
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def cache_key(url: str, params: Optional[dict] = None) -> str:
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "_")
+    return f"{url}?{urlencode(items)}"
+
+
+def ttl_for(url: str, params: Optional[dict] = None) -> int:
+    """接口对应的 TTL(秒)，0 表示不缓存"""
+    return HTTP_CACHE_TTLS.get(endpoint_name(url, params), 0)
+
+
+class ResponseCache:
+    """两级 (内存 LRU + SQLite) TTL 缓存，线程安全"""
+
+    def __init__(self, path: str, max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+                 mem_entries: int = 512) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.mem_entries = mem_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, value)
+        self._touched: Dict[str, float] = {}  # 内存层命中、尚未写回磁盘的访问时间
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_sqlite(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires REAL NOT NULL, accessed REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed)",
+            )
+        return self._db
+
+    def _remember(self, key: str, expires: float, value) -> None:
+        self._mem[key] = (expires, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_entries:
+            self._mem.popitem(last=False)
+
+    def _flush_touched(self, db: sqlite3.Connection) -> None:
+        """把内存层命中的访问时间写回磁盘（不提交，随调用方的事务提交）"""
+        if self._touched:
+            db.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                           [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+
+    def get(self, key: str, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and entry[0] > now:
+                self._mem.move_to_end(key)
+                self._touched[key] = now
+                if len(self._touched) >= 64:
+                    db = self._conn()
+                    self._flush_touched(db)
+                    db.commit()
+                self.hits += 1
+                return entry[1]
+            db = self._conn()
+            self._flush_touched(db)
+            row = db.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return default
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            db.commit()
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        now = time.time()
+        expires = now + ttl
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?)", (key, payload, expires, now),
+            )
+            self._evict(db, now)
+            db.commit()
+            self._remember(key, expires, value)
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        """清理过期条目，超出容量时按最近访问时间淘汰"""
+        self._flush_touched(db)
+        cur = db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        self.evictions += max(cur.rowcount, 0)
+        (count,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed LIMIT ?)", (overflow,),
+            )
+            self.evictions += overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._touched.clear()
+            db = self._conn()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+response_cache = ResponseCache(cache_path("http_cache.sqlite"))
@@ -0,0 +1,267 @@
+"""统一 HTTP 客户端 — 按主机复用连接池 + 令牌桶限速
+
+同步门面 (get / get_json) 基于 requests，每个主机一个长连接 Session；
+异步门面 (aget / aget_json) 基于 httpx.AsyncClient。两者共用同一组
+按主机配置的令牌桶（config.HOST_LIMITS），不同主机之间互不等待。
+get_json / aget_json 传 cache=True 时，慢变接口走 net.cache 响应缓存。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import DEFAULT_HOST_LIMIT, HOST_LIMITS, HTTP_POOL_SIZE
+from net.cache import cache_key, response_cache, ttl_for
+
+_BASE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+}
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    rate: 每秒补充的令牌数; burst: 桶容量（允许的突发请求数）。
+    reserve() 预占一个令牌并返回需要等待的秒数，同步/异步调用方各自等待。
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_lock = threading.Lock()
+_buckets: Dict[str, TokenBucket] = {}
+_sessions: Dict[str, requests.Session] = {}
+_async_client = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_closing: set = set()  # 正在关闭的旧客户端任务（持有引用防止被回收）
+_MISSING = object()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+def _host_conf(host: str) -> dict:
+    return HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)
+
+
+def _host_headers(host: str) -> dict:
+    headers = dict(_BASE_HEADERS)
+    referer = _host_conf(host).get("referer")
+    if referer:
+        headers["Referer"] = referer
+    return headers
+
+
+def bucket(host: str) -> TokenBucket:
+    """获取主机对应的令牌桶（懒创建）"""
+    b = _buckets.get(host)
+    if b is None:
+        with _lock:
+            b = _buckets.get(host)
+            if b is None:
+                conf = _host_conf(host)
+                b = _buckets[host] = TokenBucket(conf["rate"], conf["burst"])
+    return b
+
+
+def session(host: str) -> requests.Session:
+    """获取主机对应的长连接 Session（懒创建，进程内复用）"""
+    s = _sessions.get(host)
+    if s is None:
+        with _lock:
+            s = _sessions.get(host)
+            if s is None:
+                s = requests.Session()
+                s.trust_env = False  # 国内站点不走系统代理
+                s.headers.update(_host_headers(host))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _sessions[host] = s
+    return s
+
+
+# ───────── 同步门面 ─────────
+
+def get(url: str, params: Optional[dict] = None, timeout: float = 10,
+        headers: Optional[dict] = None) -> requests.Response:
+    """限速 GET（按主机排队，不同主机互不影响）"""
+    host = _host(url)
+    bucket(host).acquire()
+    return session(host).get(url, params=params, timeout=timeout, headers=headers)
+
+
+def _cacheable(data, validate: Optional[Callable[[Any], bool]]) -> bool:
+    """只缓存有效响应：非空，且通过 validate；未给 validate 时不缓存 success=false（接口错误 / 限流）"""
+    if not data:
+        return False
+    if validate is not None:
+        return bool(validate(data))
+    return not (isinstance(data, dict) and data.get("success") is False)
+
+
+def _cached(url: str, params: Optional[dict], validate: Optional[Callable[[Any], bool]]):
+    """返回 (缓存键, TTL, 命中值)；接口未配置 TTL 时键为 None，无效的缓存值按未命中处理"""
+    ttl = ttl_for(url, params)
+    if ttl <= 0:
+        return None, 0, _MISSING
+    key = cache_key(url, params)
+    hit = response_cache.get(key, _MISSING)
+    if hit is not _MISSING and not _cacheable(hit, validate):
+        hit = _MISSING
+    return key, ttl, hit
+
+
+def get_json(url: str, params: Optional[dict] = None, timeout: float = 10,
+             headers: Optional[dict] = None, cache: bool = False,
+             validate: Optional[Callable[[Any], bool]] = None):
+    """限速 GET 并解析 JSON；cache=True 时按接口 TTL 读写响应缓存
+
+    只有有效响应才写入缓存（见 _cacheable）；validate 由调用方判断响应是否有效，
+    替代默认的 success 检查。
+    """
+    key = None
+    if cache:
+        key, ttl, hit = _cached(url, params, validate)
+        if hit is not _MISSING:
+            return hit
+    data = get(url, params=params, timeout=timeout, headers=headers).json()
+    if key is not None and _cacheable(data, validate):
+        response_cache.set(key, data, ttl)
+    return data
+
+
+# ───────── 异步门面 ─────────
+
+async def _aclose_quietly(old) -> None:
+    try:
+        await old.aclose()
+    except Exception:
+        pass
+
+
+def close_replaced(old, old_loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """关闭被替换的异步客户端，释放其连接池（须在事件循环中调用）
+
+    原循环仍在其他线程运行时交给原循环关闭；原循环已停止则在当前循环尽力关闭。
+    """
+    if old is None or old.is_closed:
+        return
+    loop = asyncio.get_running_loop()
+    if old_loop is not None and old_loop is not loop and old_loop.is_running():
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(old), old_loop)
+        return
+    task = loop.create_task(_aclose_quietly(old))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def async_client():
+    """当前事件循环上的共享 httpx.AsyncClient（换循环时关闭旧客户端并重建）"""
+    global _async_client, _async_loop
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop or _async_client.is_closed:
+        close_replaced(_async_client, _async_loop)
+        _async_client = httpx.AsyncClient(
+            headers=_BASE_HEADERS,
+            follow_redirects=True,
+            trust_env=False,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE * 4,
+                                max_keepalive_connections=HTTP_POOL_SIZE * 2),
+        )
+        _async_loop = loop
+    return _async_client
+
+
+async def aget(url: str, params: Optional[dict] = None, timeout: float = 10,
+               headers: Optional[dict] = None):
+    """异步限速 GET"""
+    host = _host(url)
+    await bucket(host).acquire_async()
+    merged = _host_headers(host)
+    if headers:
+        merged.update(headers)
+    return await async_client().get(url, params=params, timeout=timeout, headers=merged)
+
+
+async def aget_json(url: str, params: Optional[dict] = None, timeout: float = 10,
+                    headers: Optional[dict] = None, cache: bool = False,
+                    validate: Optional[Callable[[Any], bool]] = None):
+    """异步限速 GET 并解析 JSON；缓存规则同 get_json"""
+    key = None
+    if cache:
+        key, ttl, hit = _cached(url, params, validate)
+        if hit is not _MISSING:
+            return hit
+    r = await aget(url, params=params, timeout=timeout, headers=headers)
+    data = r.json()
+    if key is not None and _cacheable(data, validate):
+        response_cache.set(key, data, ttl)
+    return data
+
+
+def cache_stats() -> dict:
+    """响应缓存命中统计"""
+    return response_cache.stats()
+
+
+async def aclose() -> None:
+    """关闭当前共享的异步客户端"""
+    global _async_client, _async_loop
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+    _async_loop = None
+
+
+# ───────── 代理 ─────────
+
+def disable_system_proxy() -> None:
+    """让第三方库（AKShare 等）访问国内站点时绕过系统代理
+
+    macOS 系统偏好设置里的代理会被 requests 自动读取；NO_PROXY=* 对
+    环境变量代理和系统代理都生效，无需 monkey-patch requests.Session。
+    """
+    os.environ["NO_PROXY"] = "*"
+    os.environ["no_proxy"] = "*"
@@ -0,0 +1,127 @@
+"""新闻归档 — SQLite + FTS5 全文索引
+
+每次采集的新闻批量写入归档库，按来源、发布时间建索引。
+FTS5 的 unicode61 分词会把连续汉字当成一个词，这里写入索引前
+先把汉字逐字切开（英文/数字保持整词），查询时转成短语匹配，
+任意长度的中文关键词都能命中。
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from models import NewsItem
+from storage import archive_path, open_sqlite
+
+_TOKEN_RE = re.compile(r"[\u3400-\u9fff]|[A-Za-z0-9]+")
+
+
+def _segment(text: str) -> str:
+    """汉字逐字切分、英文数字整词，空格分隔"""
+    return " ".join(_TOKEN_RE.findall(text or ""))
+
+
+def _to_match_query(q: str) -> str:
+    """用户查询 → FTS5 MATCH 表达式（空格分隔的多个词取 AND）"""
+    phrases = []
+    for term in q.split():
+        seg = _segment(term)
+        if seg:
+            phrases.append('"' + seg + '"')
+    return " AND ".join(phrases)
+
+
+class NewsArchive:
+    """新闻归档库，线程安全"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_sqlite(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS news ("
+                " id INTEGER PRIMARY KEY, fp TEXT UNIQUE, source TEXT,"
+                " title TEXT, url TEXT, content TEXT,"
+                " publish_time REAL, collected_at REAL);"
+                "CREATE INDEX IF NOT EXISTS idx_news_source ON news(source, publish_time);"
+                "CREATE INDEX IF NOT EXISTS idx_news_time ON news(publish_time);"
+                "CREATE VIRTUAL TABLE IF NOT EXISTS news_fts"
+                " USING fts5(title, content);",
+            )
+        return self._db
+
+    def add_many(self, items: List[NewsItem]) -> int:
+        """批量写入（单个事务），已归档的条目跳过，返回新写入条数"""
+        if not items:
+            return 0
+        now = time.time()
+        added = 0
+        with self._lock:
+            db = self._conn()
+            with db:
+                for item in items:
+                    cur = db.execute(
+                        "INSERT OR IGNORE INTO news "
+                        "(fp, source, title, url, content, publish_time, collected_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (item.fingerprint, item.source, item.title, item.url,
+                         item.content,
+                         (item.publish_time or datetime.fromtimestamp(now)).timestamp(),
+                         now),
+                    )
+                    if cur.rowcount:
+                        db.execute(
+                            "INSERT INTO news_fts (rowid, title, content) VALUES (?, ?, ?)",
+                            (cur.lastrowid, _segment(item.title), _segment(item.content)),
+                        )
+                        added += 1
+        return added
+
+    def search(self, q: str = "", start: Optional[datetime] = None,
+               end: Optional[datetime] = None, source: str = "",
+               limit: int = 100) -> List[dict]:
+        """按关键词 / 时间区间 / 来源检索，结果按发布时间倒序"""
+        where, params = [], []
+        match = _to_match_query(q) if q else ""
+        if match:
+            where.append("n.id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH ?)")
+            params.append(match)
+        if start:
+            where.append("n.publish_time >= ?")
+            params.append(start.timestamp())
+        if end:
+            where.append("n.publish_time < ?")
+            params.append(end.timestamp())
+        if source:
+            where.append("n.source = ?")
+            params.append(source)
+        sql = "SELECT n.source, n.title, n.url, n.content, n.publish_time FROM news n"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY n.publish_time DESC LIMIT ?"
+        params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn().execute(sql, params).fetchall()
+        return [
+            {
+                "source": src,
+                "title": title,
+                "url": url,
+                "content": content,
+                "publish_time": datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for src, title, url, content, ts in rows
+        ]
+
+
+news_archive = NewsArchive(archive_path("news.sqlite"))
@@ -2,30 +2,76 @@
 
 from __future__ import annotations
 
+import importlib.util
 from abc import ABC, abstractmethod
-from typing import List
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
 
 import httpx
 
-from config import HEADERS, REQUEST_TIMEOUT
+from config import (HEADERS, NEWS_HTTP2, NEWS_KEEPALIVE_EXPIRY, NEWS_MAX_CONNECTIONS,
+                    NEWS_MAX_KEEPALIVE, NEWS_MAX_PAGES, REQUEST_TIMEOUT)
 from models import NewsItem
 
 
+@lru_cache(maxsize=4096)
+def parse_datetime(value: str) -> Optional[datetime]:
+    """解析 "YYYY-MM-DD[ HH:MM[:SS]]"（按固定位置切片，结果缓存）
+
+    列表接口里大量条目共用相同的时间串，缓存后每个时间串只解析一次。
+    """
+    if not value:
+        return None
+    v = value.strip()
+    try:
+        if len(v) >= 10 and v[4] == "-" and v[7] == "-":
+            y, m, d = int(v[0:4]), int(v[5:7]), int(v[8:10])
+            if len(v) >= 19:
+                return datetime(y, m, d, int(v[11:13]), int(v[14:16]), int(v[17:19]))
+            if len(v) >= 16:
+                return datetime(y, m, d, int(v[11:13]), int(v[14:16]))
+            return datetime(y, m, d)
+    except ValueError:
+        pass
+    return None
+
+
+def build_client() -> httpx.AsyncClient:
+    """新闻采集用的异步客户端：显式连接池上限，可用时启用 HTTP/2"""
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+        proxy=None,  # 国内站点不走代理
+        http2=NEWS_HTTP2 and importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=NEWS_MAX_CONNECTIONS,
+            max_keepalive_connections=NEWS_MAX_KEEPALIVE,
+            keepalive_expiry=NEWS_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
 class BaseSource(ABC):
     """所有新闻源的抽象基类"""
 
     name: str = "base"
 
-    def __init__(self) -> None:
-        self.client = httpx.AsyncClient(
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT,
-            follow_redirects=True,
-            proxy=None,  # 国内站点不走代理
-        )
+    def __init__(self, client: Optional[httpx.AsyncClient] = None) -> None:
+        # 由 NewsCollector 注入共享客户端；单独使用时自建并负责关闭
+        self._owns_client = client is None
+        self.client = client or build_client()
+        # 增量采集：fetch 前由采集器设置 cursor（上次采到的最新位置），
+        # fetch 只返回游标之后的条目，并把本次最新位置写入 next_cursor。
+        # cursor 为空（首次运行）时只取第一页。
+        self.cursor: Optional[str] = None
+        self.next_cursor: Optional[str] = None
+        self.max_pages = NEWS_MAX_PAGES
 
     async def close(self) -> None:
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
     @abstractmethod
     async def fetch(self) -> List[NewsItem]:
@@ -3,48 +3,196 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 
+import httpx
+
+from config import JIN10_QUEUE_MAX, NEWS_DEADLINE, NEWS_SOURCE_BUDGETS
 from models import NewsItem
-from news.base import BaseSource
+from news.archive import NewsArchive, news_archive
+from news.base import BaseSource, build_client
+from news.dedup import cluster_near_duplicates
 from news.eastmoney import EastMoneySource
 from news.sina import SinaSource
 from news.jin10 import Jin10Source
+from news.store import NewsStore, news_store
+from net.client import close_replaced
 
 
 class NewsCollector:
-    """A股新闻并发采集器"""
+    """A股新闻并发采集器
+
+    持有一个长期存活的共享 httpx.AsyncClient 并注入各新闻源，客户端
+    （连接池、HTTP/2 配置）跨多次 collect() 复用。空闲连接只保持
+    NEWS_KEEPALIVE_EXPIRY 秒：金十轮询的连接一直处于活跃状态，其余源在
+    两次报告之间的长间隔里会重新建连。
+    start_polling() 后金十快讯改为常驻轮询，新快讯进入 self.flashes 队列，
+    collect() 时取出队列中积累的快讯，不再单独请求金十。
+    """
 
-    def __init__(self, sources: Optional[List[BaseSource]] = None) -> None:
+    def __init__(self, sources: Optional[List[BaseSource]] = None,
+                 client: Optional[httpx.AsyncClient] = None,
+                 store: Optional[NewsStore] = news_store,
+                 archive: Optional[NewsArchive] = news_archive) -> None:
+        self.client = client or build_client()
+        self.store = store
+        self.archive = archive
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.source_stats: Dict[str, dict] = {}  # {源: {"status", "latency", "count"}}
+        self.flashes: Optional[asyncio.Queue] = None
+        self._poller: Optional[Jin10Source] = None
+        self._poll_task: Optional[asyncio.Task] = None
         self.sources = sources or [
-            EastMoneySource(),
-            SinaSource(),
-            Jin10Source(),
+            EastMoneySource(self.client),
+            SinaSource(self.client),
+            Jin10Source(self.client),
         ]
 
-    async def collect(self) -> List[NewsItem]:
-        """并发采集 → 去重 → 按时间排序"""
-        raw = await self._fetch_all()
+    def _bind_loop(self) -> None:
+        """客户端连接绑定在事件循环上；换了循环则关闭旧客户端并重建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop or self.client.is_closed:
+            close_replaced(self.client, self._loop)
+            self.client = build_client()
+            self._loop = loop
+            for src in self.sources:
+                if not src._owns_client:
+                    src.client = self.client
+            if self._poller is not None:
+                self._poller.client = self.client
+
+    async def start_polling(self) -> asyncio.Queue:
+        """启动金十快讯轮询（已在运行则直接返回队列）"""
+        self._bind_loop()
+        if self._poll_task is None or self._poll_task.done():
+            poller = Jin10Source(self.client)
+            poller.cursor = self.store.cursors().get(poller.name) if self.store else None
+            self.flashes = asyncio.Queue(maxsize=JIN10_QUEUE_MAX)
+            self._poller = poller
+            self._poll_task = asyncio.create_task(poller.poll(self.flashes))
+        return self.flashes
+
+    def _polling(self) -> bool:
+        return self._poll_task is not None and not self._poll_task.done()
+
+    def _drain_flashes(self) -> List[NewsItem]:
+        items = []
+        while self.flashes is not None and not self.flashes.empty():
+            items.append(self.flashes.get_nowait())
+        return items
+
+    async def collect(self, deadline: Optional[float] = None) -> List[NewsItem]:
+        """并发增量采集 → 去重 → 合并近期窗口 → 按时间排序
+
+        各源只采集游标之后的新条目，与 store 中的近期新闻窗口合并后返回；
+        store=None 时退化为单次采集。
+        deadline: 整体截止秒数（默认 NEWS_DEADLINE）。到点仍未返回的源被取消，
+        只使用已到达的结果；各源耗时与状态记录在 self.source_stats。
+        """
+        self._bind_loop()
+        cursors = self.store.cursors() if self.store else {}
+        sources = self.sources
+        if self._polling():
+            sources = [src for src in sources if src.name != self._poller.name]
+        for src in sources:
+            src.cursor = cursors.get(src.name)
+            src.next_cursor = None
+
+        raw = await self._fetch_all(sources, NEWS_DEADLINE if deadline is None else deadline)
+        if self._polling():
+            flashes = self._drain_flashes()
+            self.source_stats[self._poller.name] = {
+                "status": self._poller.poll_error or "ok",
+                "latency": 0.0, "count": len(flashes),
+            }
+            self._poller.next_cursor = self._poller.cursor
+            sources = sources + [self._poller]
+            raw.extend(flashes)
+            print(f"  [{self._poller.name}] 轮询 {len(flashes)} 条"
+                  + (f" (最近一次{self._poller.poll_error})" if self._poller.poll_error else ""))
         unique = self._deduplicate(raw)
+
+        if self.archive:
+            try:
+                self.archive.add_many(unique)
+            except Exception as e:
+                print(f"  [归档] 写入失败: {e}")
+
+        if self.store:
+            # 只有成功完成的源才推进游标，超时/失败的下次从原位置重采
+            fresh = self.store.add_unseen(unique)
+            for src in sources:
+                if self.source_stats.get(src.name, {}).get("status") == "ok":
+                    self.store.save_cursor(src.name, src.next_cursor)
+            items = self.store.window()
+            print(f"[新闻] 采集 {len(raw)} 条 -> 新增 {len(fresh)} 条 | "
+                  f"近期窗口 {len(items)} 条")
+        else:
+            items = unique
+            print(f"[新闻] 采集 {len(raw)} 条 -> 去重后 {len(unique)} 条")
+
+        # 跨来源近似重复合并（同一事件只保留一条，记录全部来源）
+        before = len(items)
+        items = cluster_near_duplicates(items)
+        if len(items) < before:
+            print(f"[新闻] 近似重复合并 {before} -> {len(items)} 条")
+
         # 有时间的排前面，按时间降序
-        unique.sort(
+        items.sort(
             key=lambda x: x.publish_time or __import__("datetime").datetime.min,
             reverse=True,
         )
-        print(f"[新闻] 采集 {len(raw)} 条 -> 去重后 {len(unique)} 条")
-        return unique
+        return items
+
+    async def _fetch_source(self, src: BaseSource, budget: float) -> List[NewsItem]:
+        """单个源在自己的时间预算内采集，并记录状态"""
+        start = time.perf_counter()
+        stat = {"status": "running", "latency": 0.0, "count": 0}
+        self.source_stats[src.name] = stat
+        try:
+            items = await asyncio.wait_for(src.fetch(), timeout=budget)
+            stat.update(status="ok", count=len(items))
+            return items
+        except asyncio.TimeoutError:
+            stat["status"] = "timeout"
+            return []
+        except asyncio.CancelledError:
+            stat["status"] = "cancelled"
+            raise
+        except Exception as e:
+            stat["status"] = f"error: {e.__class__.__name__}"
+            return []
+        finally:
+            stat["latency"] = round(time.perf_counter() - start, 3)
+
+    async def _fetch_all(self, sources: List[BaseSource], deadline: float) -> List[NewsItem]:
+        self.source_stats = {}
+        tasks = [
+            asyncio.create_task(self._fetch_source(
+                src, min(NEWS_SOURCE_BUDGETS.get(src.name, deadline), deadline),
+            ))
+            for src in sources
+        ]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
 
-    async def _fetch_all(self) -> List[NewsItem]:
-        tasks = [src.fetch() for src in self.sources]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
         all_items: List[NewsItem] = []
-        for i, result in enumerate(results):
-            name = self.sources[i].name
-            if isinstance(result, list):
-                all_items.extend(result)
-                print(f"  [{name}] {len(result)} 条")
+        for src, task in zip(sources, tasks):
+            stat = self.source_stats[src.name]
+            if task in done and not task.cancelled():
+                all_items.extend(task.result())
+            if stat["status"] == "ok":
+                print(f"  [{src.name}] {stat['count']} 条 ({stat['latency']:.1f}s)")
             else:
-                print(f"  [{name}] 采集失败: {result}")
+                print(f"  [{src.name}] 采集失败: {stat['status']} ({stat['latency']:.1f}s)")
         return all_items
 
     def _deduplicate(self, items: List[NewsItem]) -> List[NewsItem]:
@@ -58,8 +206,13 @@ class NewsCollector:
         return unique
 
     async def close(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            await asyncio.gather(self._poll_task, return_exceptions=True)
+            self._poll_task = None
         for src in self.sources:
             await src.close()
+        await self.client.aclose()
 
     async def __aenter__(self):
         return self
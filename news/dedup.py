@@ -0,0 +1,166 @@
+"""跨来源近似重复新闻聚类 (MinHash + 分段 LSH)
+
+同一事件在东方财富、新浪、金十的标题往往只是措辞略有不同，按指纹
+去重无法合并。这里对标题的汉字/单词二元组计算 MinHash 签名，签名
+切成若干段入桶，只有同桶的候选才比较；候选再用二元组集合的精确
+Jaccard 相似度确认，整体接近线性。每个簇保留一条代表并记录全部来源。
+
+只差几个字的不同事件（"宁德时代/比亚迪 净利润增长25%"、"1000亿/2000亿
+逆回购"、"9月/8月 CPI"）二元组 Jaccard 也有 0.6~0.8，所以阈值
+(NEWS_DUP_THRESHOLD) 取 0.8，并且两条标题出现以下差异时一律不合并：
+- 各自独有的词里有数字（金额、比例、月份等）；
+- 提到的个股不同（按证券主表的名称匹配）；
+- 各自独有的二元组方向相反（涨/跌、增/减 等，如"集体收涨"与"集体收跌"）。
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from config import NEWS_DUP_THRESHOLD
+from data.security_master import security_master
+from models import NewsItem
+from news.text_index import AhoCorasick
+
+_NUM_PERM = 64
+_BANDS = 16                 # 16 段 × 4 行：相似度 0.8 的候选同桶概率 >99.9%，0.2 的约 2.5%
+_ROWS = _NUM_PERM // _BANDS
+_MASK = np.uint64(0xFFFFFFFF)
+_MIN_SHINGLES = 4           # 过短的标题只做精确去重
+
+_rng = np.random.default_rng(20240229)
+_PERM_A = (_rng.integers(1, 1 << 32, _NUM_PERM, dtype=np.uint64) | np.uint64(1))[:, None]
+_PERM_B = _rng.integers(0, 1 << 32, _NUM_PERM, dtype=np.uint64)[:, None]
+
+_TOKEN_RE = re.compile(r"[\u3400-\u9fff]|[A-Za-z0-9]+")
+_PREFIX_RE = re.compile(r"^(\[重要\]\s*|金十数据\d*月\d*日讯[，,]?)")
+
+# 方向相反的字：两条标题的差异部分分属两个方向时视为不同事件
+_UP_CHARS = frozenset("涨升增高盈")
+_DOWN_CHARS = frozenset("跌降减低亏")
+_NUMERALS = frozenset("0123456789〇零一二三四五六七八九十百千万亿两")
+
+# 个股名称自动机，按证券主表的名称数组缓存（主表重建后重新编译）
+_entities: Optional[Tuple[object, AhoCorasick]] = None
+
+
+def _clean(title: str) -> str:
+    return _PREFIX_RE.sub("", title)
+
+
+def _tokens(title: str) -> List[str]:
+    return _TOKEN_RE.findall(_clean(title))
+
+
+def _shingles(tokens: List[str]) -> FrozenSet[str]:
+    """标题的二元组集合（去掉来源前缀和标点）"""
+    return frozenset(a + b for a, b in zip(tokens, tokens[1:]))
+
+
+def _entity_automaton() -> AhoCorasick:
+    global _entities
+    names = security_master.names if len(security_master) else None
+    if _entities is None or _entities[0] is not names:
+        patterns = []
+        for n in (names.tolist() if names is not None else []):
+            n = n.replace(" ", "").lstrip("*")
+            if n.startswith("ST"):
+                n = n[2:]
+            if len(n) >= 2:
+                patterns.append(n)
+        _entities = (names, AhoCorasick(patterns))
+    return _entities[1]
+
+
+def _numbers(tokens: FrozenSet[str]) -> bool:
+    """词中是否含数字（阿拉伯数字或中文数字）"""
+    return any(not _NUMERALS.isdisjoint(t) for t in tokens)
+
+
+def _directions(shingles: FrozenSet[str]) -> int:
+    """二元组中出现的方向：1 涨、2 跌（按位或）"""
+    chars = set("".join(shingles))
+    return (1 if chars & _UP_CHARS else 0) | (2 if chars & _DOWN_CHARS else 0)
+
+
+def _opposite(a: FrozenSet[str], b: FrozenSet[str]) -> bool:
+    """两条标题的差异部分方向相反（一条独有涨、另一条独有跌）"""
+    da, db = _directions(a - b), _directions(b - a)
+    return bool((da & 1 and db & 2) or (da & 2 and db & 1))
+
+
+def minhash(shingles: FrozenSet[str]) -> np.ndarray:
+    """64 维 MinHash 签名"""
+    h = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                    dtype=np.uint64, count=len(shingles))
+    return ((_PERM_A * h + _PERM_B) & _MASK).min(axis=1)
+
+
+def _distinct(a: Tuple[FrozenSet[str], FrozenSet[str], frozenset],
+              b: Tuple[FrozenSet[str], FrozenSet[str], frozenset]) -> bool:
+    """相似度够高但仍是不同事件：独有词含数字、个股不同或方向相反"""
+    (sh_a, tok_a, ent_a), (sh_b, tok_b, ent_b) = a, b
+    return _numbers(tok_a ^ tok_b) or ent_a != ent_b or _opposite(sh_a, sh_b)
+
+
+def cluster_near_duplicates(items: List[NewsItem],
+                            threshold: float = NEWS_DUP_THRESHOLD) -> List[NewsItem]:
+    """合并近似重复的新闻，返回每簇的代表（保持输入顺序，代表为簇内首条）
+
+    代表的 sources 字段记录簇内全部来源（按出现顺序去重）。
+    """
+    n = len(items)
+    parent = list(range(n))
+    entities = _entity_automaton()
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    features: Dict[int, tuple] = {}   # 下标 -> (二元组, 词, 个股)
+    buckets: Dict[tuple, List[int]] = {}
+    for idx, item in enumerate(items):
+        tokens = _tokens(item.title)
+        sh = _shingles(tokens)
+        if len(sh) < _MIN_SHINGLES:
+            continue
+        feat = features[idx] = (sh, frozenset(tokens),
+                                frozenset(entities.findall(_clean(item.title))))
+        sig = minhash(sh)
+        checked = set()
+        for band in range(_BANDS):
+            key = (band, sig[band * _ROWS:(band + 1) * _ROWS].tobytes())
+            for other in buckets.setdefault(key, []):
+                if other in checked:
+                    continue
+                checked.add(other)
+                other_sh = features[other][0]
+                if (len(sh & other_sh) / len(sh | other_sh) >= threshold
+                        and not _distinct(feat, features[other])):
+                    ra, rb = find(idx), find(other)
+                    if ra != rb:
+                        parent[max(ra, rb)] = min(ra, rb)
+            buckets[key].append(idx)
+
+    clusters: Dict[int, List[int]] = {}
+    for idx in range(n):
+        clusters.setdefault(find(idx), []).append(idx)
+
+    result = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        rep = items[members[0]]
+        sources = []
+        for m in members:
+            for src in items[m].sources or [items[m].source]:
+                if src not in sources:
+                    sources.append(src)
+        rep.sources = sources
+        result.append(rep)
+    return result
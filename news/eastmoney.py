@@ -1,14 +1,21 @@
 """东方财富 A股要闻 + 财经导读"""
 
-from datetime import datetime
-from typing import List
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
 
+from config import EASTMONEY_CONCURRENCY, EASTMONEY_PAGE_DEPTH
 from models import NewsItem
-from news.base import BaseSource
+from news.base import BaseSource, parse_datetime
 
 
 class EastMoneySource(BaseSource):
-    """东方财富网 — A股资讯"""
+    """东方财富网 — A股资讯
+
+    两个栏目、多页并发拉取（EASTMONEY_CONCURRENCY 限制并发数）。
+    游标为各栏目最新一条的 art_code 和发布时间，遇到上次的 art_code 或
+    更早发布的条目即停止，最多翻 page_depth 页。
+    """
 
     name = "eastmoney"
 
@@ -32,44 +39,106 @@ class EastMoneySource(BaseSource):
         "param2": "",
     }
 
+    page_depth = EASTMONEY_PAGE_DEPTH
+
     async def fetch(self) -> List[NewsItem]:
+        cursors = self._load_cursor()
+        sem = asyncio.Semaphore(EASTMONEY_CONCURRENCY)
+        columns = (self.PARAMS_A_SHARE, self.PARAMS_FINANCE)
+        results = await asyncio.gather(*(
+            self._fetch_column(params, cursors.get(params["columns"]), sem)
+            for params in columns
+        ))
+
+        next_cursors = dict(cursors)
         items: List[NewsItem] = []
-        items.extend(await self._fetch_api(self.PARAMS_A_SHARE))
-        items.extend(await self._fetch_api(self.PARAMS_FINANCE))
+        for params, (new_items, newest) in zip(columns, results):
+            items.extend(new_items)
+            if newest:
+                next_cursors[params["columns"]] = newest
+        self.next_cursor = json.dumps(next_cursors) if next_cursors else None
         return items
 
-    async def _fetch_api(self, params: dict) -> List[NewsItem]:
-        items = []
+    def _load_cursor(self) -> Dict[str, dict]:
+        """{栏目: {"code": art_code, "time": 时间戳}}"""
         try:
-            resp = await self.client.get(self.API, params=params)
-            data = resp.json()
-            for entry in data.get("data", {}).get("list", []) or []:
-                title = entry.get("title", "").strip()
-                if not title:
-                    continue
-
-                pub_time = None
-                date_str = entry.get("showTime") or entry.get("date", "")
-                if date_str:
-                    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
-                        try:
-                            pub_time = datetime.strptime(date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-
-                art_code = entry.get("art_code", "") or entry.get("code", "")
-                url = ""
-                if art_code:
-                    url = f"https://finance.eastmoney.com/a/{art_code}.html"
-
-                items.append(NewsItem(
-                    title=title,
-                    url=url,
-                    source=self.name,
-                    content=entry.get("mediaName", ""),
-                    publish_time=pub_time,
-                ))
-        except Exception:
-            pass
+            cursors = json.loads(self.cursor) if self.cursor else {}
+        except (ValueError, TypeError):
+            return {}
+        # 兼容旧格式 {栏目: art_code}
+        return {k: v if isinstance(v, dict) else {"code": v, "time": 0}
+                for k, v in cursors.items()}
+
+    async def _fetch_column(self, params: dict, since: Optional[dict],
+                            sem: asyncio.Semaphore) -> Tuple[List[NewsItem], Optional[dict]]:
+        """取栏目中上次游标之后的条目，返回 (新条目, 新游标)
+
+        首次运行并发拉取 page_depth 页；有游标时先取第一页，
+        未追上游标（有断档）再并发补齐其余页。
+        """
+        async def page(i: int):
+            async with sem:
+                return await self._fetch_api({**params, "pageIndex": str(i)})
+
+        if since:
+            pages = [await page(0)]
+            if pages[0] and not self._reaches(pages[0], since):
+                pages += await asyncio.gather(*(page(i) for i in range(1, self.page_depth)))
+        else:
+            pages = await asyncio.gather(*(page(i) for i in range(self.page_depth)))
+
+        items: List[NewsItem] = []
+        newest = None
+        seen = set()
+        for entries in pages:
+            for art_code, item in entries:
+                if newest is None:
+                    ts = item.publish_time.timestamp() if item.publish_time else 0
+                    newest = {"code": art_code, "time": ts}
+                if since and self._is_old(art_code, item, since):
+                    return items, newest
+                if art_code not in seen:
+                    seen.add(art_code)
+                    items.append(item)
+            if not entries:
+                break
+        return items, newest
+
+    @staticmethod
+    def _is_old(art_code: str, item: NewsItem, since: dict) -> bool:
+        """到达上次的 art_code，或发布时间早于上次最新一条"""
+        if art_code and art_code == since.get("code"):
+            return True
+        since_time = since.get("time") or 0
+        return bool(since_time and item.publish_time
+                    and item.publish_time.timestamp() < since_time)
+
+    def _reaches(self, entries: list, since: dict) -> bool:
+        return any(self._is_old(code, item, since) for code, item in entries)
+
+    async def _fetch_api(self, params: dict) -> List[Tuple[str, NewsItem]]:
+        """请求失败直接抛出，由采集器记为该源的错误状态"""
+        items = []
+        resp = await self.client.get(self.API, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        for entry in data.get("data", {}).get("list", []) or []:
+            title = entry.get("title", "").strip()
+            if not title:
+                continue
+
+            pub_time = parse_datetime(entry.get("showTime") or entry.get("date", ""))
+
+            art_code = entry.get("art_code", "") or entry.get("code", "")
+            url = ""
+            if art_code:
+                url = f"https://finance.eastmoney.com/a/{art_code}.html"
+
+            items.append((art_code, NewsItem(
+                title=title,
+                url=url,
+                source=self.name,
+                content=entry.get("mediaName", ""),
+                publish_time=pub_time,
+            )))
         return items
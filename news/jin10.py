@@ -2,83 +2,135 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import re
-from datetime import datetime
-from typing import List
+from typing import Iterator, List, Optional
 
+from config import JIN10_POLL_INTERVAL
 from models import NewsItem
-from news.base import BaseSource
+from news.base import BaseSource, parse_datetime
+
+_HTML_RE = re.compile(r"<[^>]+>")
+_SEP_RE = re.compile(r"[\s,]*")
+_DECODER = json.JSONDecoder()
 
 
 def _strip_html(text: str) -> str:
-    return re.sub(r"<[^>]+>", "", text or "")
+    return _HTML_RE.sub("", text or "")
+
+
+def _flash_id(value) -> int:
+    """快讯 id 转整数（非数字视为 0）"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _iter_entries(text: str) -> Iterator[dict]:
+    """逐条解码响应中的快讯数组（var defined = [...]; 或纯 JSON）
+
+    用 raw_decode 在原字符串上按位置逐个解析，不截取子串、不整体 loads，
+    调用方停止迭代后剩余条目不再解析。
+    """
+    pos = text.find("[")
+    if pos < 0:
+        return
+    pos += 1
+    end = len(text)
+    while True:
+        pos = _SEP_RE.match(text, pos).end()
+        if pos >= end or text[pos] == "]":
+            return
+        entry, pos = _DECODER.raw_decode(text, pos)
+        if isinstance(entry, dict):
+            yield entry
 
 
 class Jin10Source(BaseSource):
-    """金十数据 — 快讯"""
+    """金十数据 — 快讯
+
+    游标为上次最新一条快讯的 id（数字串，随时间递增）。接口只提供最新一批、
+    按时间倒序，无法向前翻页；解析到不比游标新的条目即停止。
+    poll() 为轮询模式：常驻运行，把新快讯按时间顺序推入 asyncio.Queue。
+    """
 
     name = "jin10"
 
     FLASH_URL = "https://www.jin10.com/flash_newest.js"
+    HEADERS = {
+        "Referer": "https://www.jin10.com/",
+        "X-App-Id": "bVBF4FyRTn5NJF5n",
+    }
+
+    # 轮询模式下最近一次请求的错误（成功后清空），供采集器报告状态
+    poll_error: Optional[str] = None
 
     async def fetch(self) -> List[NewsItem]:
         return await self._fetch_flash()
 
-    async def _fetch_flash(self) -> List[NewsItem]:
-        items = []
-        try:
-            headers = {
-                "Referer": "https://www.jin10.com/",
-                "X-App-Id": "bVBF4FyRTn5NJF5n",
-            }
-            resp = await self.client.get(self.FLASH_URL, headers=headers)
-            text = resp.text.strip()
-
-            # 响应格式: var defined = [...]; 或纯 JSON
-            if text.startswith("var "):
-                match = re.search(r"\[.*\]", text, re.DOTALL)
-                if match:
-                    text = match.group()
+    async def poll(self, queue: asyncio.Queue,
+                   interval: float = JIN10_POLL_INTERVAL) -> None:
+        """轮询快讯，新条目（旧→新）推入 queue，直到任务被取消
 
+        队列满时丢弃最旧的一条。游标只在内存中推进；请求失败记入
+        poll_error，下一轮从原游标重试。
+        """
+        while True:
             try:
-                data = json.loads(text)
-            except (json.JSONDecodeError, ValueError):
-                return items
-
-            for entry in data:
-                content = entry.get("data", {})
-                if isinstance(content, str):
-                    title = content
-                elif isinstance(content, dict):
-                    title = content.get("content", "") or content.get("title", "")
-                else:
-                    continue
-
-                title = _strip_html(title).strip()
-                if not title or len(title) < 6:
-                    continue
-
-                pub_time = None
-                time_str = entry.get("time")
-                if time_str:
-                    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                        try:
-                            pub_time = datetime.strptime(time_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-
-                is_important = entry.get("important", 0)
-                prefix = "[重要] " if is_important else ""
-
-                items.append(NewsItem(
-                    title=prefix + title[:120],
-                    url="https://www.jin10.com/",
-                    source=self.name,
-                    content=title[:200],
-                    publish_time=pub_time,
-                ))
-        except Exception:
-            pass
-        return items[:40]
+                items = await self._fetch_flash()
+            except Exception as e:
+                self.poll_error = f"error: {e.__class__.__name__}"
+                await asyncio.sleep(interval)
+                continue
+            self.poll_error = None
+            if self.next_cursor:
+                self.cursor = self.next_cursor
+            for item in reversed(items):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(item)
+            await asyncio.sleep(interval)
+
+    async def _fetch_flash(self) -> List[NewsItem]:
+        items = []
+        since = _flash_id(self.cursor)
+        newest = since
+        resp = await self.client.get(self.FLASH_URL, headers=self.HEADERS)
+        resp.raise_for_status()
+        for entry in _iter_entries(resp.text):
+            flash_id = _flash_id(entry.get("id"))
+            if since and flash_id <= since:
+                break
+            newest = max(newest, flash_id)
+            item = self._parse_entry(entry)
+            if item:
+                items.append(item)
+                # 首次运行只取最新 40 条；增量运行保留游标之后的全部条目
+                if not since and len(items) >= 40:
+                    break
+        self.next_cursor = str(newest) if newest else None
+        return items
+
+    def _parse_entry(self, entry: dict) -> Optional[NewsItem]:
+        content = entry.get("data", {})
+        if isinstance(content, str):
+            title = content
+        elif isinstance(content, dict):
+            title = content.get("content", "") or content.get("title", "")
+        else:
+            return None
+
+        title = _strip_html(title).strip()
+        if not title or len(title) < 6:
+            return None
+
+        prefix = "[重要] " if entry.get("important", 0) else ""
+        return NewsItem(
+            title=prefix + title[:120],
+            url="https://www.jin10.com/",
+            source=self.name,
+            content=title[:200],
+            publish_time=parse_datetime(entry.get("time") or ""),
+        )
@@ -8,7 +8,11 @@ from news.base import BaseSource
 
 
 class SinaSource(BaseSource):
-    """新浪财经 — 股票频道"""
+    """新浪财经 — 股票频道
+
+    游标为上次最新一条的 ctime（秒级时间戳）。整页都比游标新说明有断档，
+    继续向后翻页，直到追上游标或达到 max_pages。
+    """
 
     name = "sina"
 
@@ -21,33 +25,53 @@ class SinaSource(BaseSource):
     }
 
     async def fetch(self) -> List[NewsItem]:
-        return await self._fetch_roll_api()
+        try:
+            since = int(self.cursor) if self.cursor else 0
+        except ValueError:
+            since = 0
+        items: List[NewsItem] = []
+        newest = since
+        pages = self.max_pages if since else 1
+        for page in range(1, pages + 1):
+            entries = await self._fetch_roll_api(page)
+            if not entries:
+                break
+            for ctime, item in entries:
+                newest = max(newest, ctime)
+                if ctime > since:
+                    items.append(item)
+            if min(ctime for ctime, _ in entries) <= since:
+                break
+        self.next_cursor = str(newest) if newest else None
+        return items
 
-    async def _fetch_roll_api(self) -> List[NewsItem]:
+    async def _fetch_roll_api(self, page: int = 1) -> list:
+        """返回 [(ctime, NewsItem), ...]；请求失败直接抛出，由采集器记为错误状态"""
         items = []
-        try:
-            resp = await self.client.get(self.ROLL_URL, params=self.ROLL_PARAMS)
-            data = resp.json()
-            for entry in data.get("result", {}).get("data", []):
-                title = entry.get("title", "").strip()
-                if not title:
-                    continue
-
-                pub_time = None
-                pub_ts = entry.get("ctime", "")
-                if pub_ts:
-                    try:
-                        pub_time = datetime.fromtimestamp(int(pub_ts))
-                    except (ValueError, OSError):
-                        pass
-
-                items.append(NewsItem(
-                    title=title,
-                    url=entry.get("url", ""),
-                    source=self.name,
-                    content=entry.get("intro", ""),
-                    publish_time=pub_time,
-                ))
-        except Exception:
-            pass
+        params = {**self.ROLL_PARAMS, "page": str(page)}
+        resp = await self.client.get(self.ROLL_URL, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        for entry in data.get("result", {}).get("data", []):
+            title = entry.get("title", "").strip()
+            if not title:
+                continue
+
+            pub_time = None
+            ctime = 0
+            pub_ts = entry.get("ctime", "")
+            if pub_ts:
+                try:
+                    ctime = int(pub_ts)
+                    pub_time = datetime.fromtimestamp(ctime)
+                except (ValueError, OSError):
+                    pass
+
+            items.append((ctime, NewsItem(
+                title=title,
+                url=entry.get("url", ""),
+                source=self.name,
+                content=entry.get("intro", ""),
+                publish_time=pub_time,
+            )))
         return items
@@ -0,0 +1,104 @@
+"""新闻增量采集状态 — 各源游标 + 持久化已见集合 + 近期新闻滚动窗口
+
+SQLite 持久化在 CACHE_DIR 下。每次采集只保留游标之后的新条目，
+与窗口内已存的近期新闻合并，日内高频调度也不必重复下载。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import NEWS_SEEN_DAYS, NEWS_WINDOW_HOURS, NEWS_WINDOW_MAX
+from models import NewsItem
+from storage import cache_path, open_sqlite
+
+
+class NewsStore:
+    """新闻采集状态存储，线程安全"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = open_sqlite(
+                self.path,
+                "CREATE TABLE IF NOT EXISTS cursors ("
+                " source TEXT PRIMARY KEY, cursor TEXT, updated REAL);"
+                "CREATE TABLE IF NOT EXISTS recent ("
+                " fp TEXT PRIMARY KEY, source TEXT, title TEXT, url TEXT,"
+                " content TEXT, publish_time REAL, seen_at REAL);"
+                "CREATE INDEX IF NOT EXISTS idx_recent_seen ON recent(seen_at);",
+            )
+        return self._db
+
+    # ── 游标 ──
+
+    def cursors(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn().execute("SELECT source, cursor FROM cursors").fetchall()
+        return {src: cur for src, cur in rows if cur}
+
+    def save_cursor(self, source: str, cursor: Optional[str]) -> None:
+        if not cursor:
+            return
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO cursors (source, cursor, updated) VALUES (?, ?, ?)",
+                (source, cursor, time.time()),
+            )
+            db.commit()
+
+    # ── 已见集合 + 滚动窗口 ──
+
+    def add_unseen(self, items: List[NewsItem]) -> List[NewsItem]:
+        """写入未见过的条目并返回它们（已见的丢弃）"""
+        if not items:
+            return []
+        now = time.time()
+        fresh = []
+        with self._lock:
+            db = self._conn()
+            for item in items:
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO recent "
+                    "(fp, source, title, url, content, publish_time, seen_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (item.fingerprint, item.source, item.title, item.url, item.content,
+                     item.publish_time.timestamp() if item.publish_time else None, now),
+                )
+                if cur.rowcount:
+                    fresh.append(item)
+            db.commit()
+        return fresh
+
+    def window(self) -> List[NewsItem]:
+        """滚动窗口内的近期新闻（按首次采集时间倒序），并清理过期的已见记录"""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM recent WHERE seen_at < ?",
+                       (now - NEWS_SEEN_DAYS * 86400,))
+            db.commit()
+            rows = db.execute(
+                "SELECT source, title, url, content, publish_time FROM recent "
+                "WHERE seen_at >= ? ORDER BY seen_at DESC, rowid LIMIT ?",
+                (now - NEWS_WINDOW_HOURS * 3600, NEWS_WINDOW_MAX),
+            ).fetchall()
+        return [
+            NewsItem(
+                title=title, url=url or "", source=source, content=content or "",
+                publish_time=datetime.fromtimestamp(ts) if ts else None,
+            )
+            for source, title, url, content, ts in rows
+        ]
+
+
+news_store = NewsStore(cache_path("news_state.sqlite"))
@@ -0,0 +1,97 @@
+"""新闻文本多模式索引 (Aho-Corasick)
+
+把所有待查名称/关键词编译成一个自动机，每条新闻标题只扫描一遍，
+即可得到全部命中及其位置。匹配成本与新闻文本总长度成线性，
+与名称、关键词的数量无关。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import NewsItem
+
+
+class AhoCorasick:
+    """Aho-Corasick 多模式字符串匹配自动机"""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        self.patterns = set()
+        for p in patterns:
+            if p and p not in self.patterns:
+                self.patterns.add(p)
+                self._insert(p)
+        self._build()
+
+    def _insert(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 合并后缀节点的输出，匹配时无需再沿失败链回溯
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """逐个产出 (起始位置, 模式)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for p in out[node]:
+                yield i - len(p) + 1, p
+
+    def findall(self, text: str) -> set:
+        """文本中出现过的全部模式"""
+        return {p for _, p in self.iter_matches(text)}
+
+
+class NewsTextIndex:
+    """新闻标题索引：记录每个模式首次命中的新闻（按新闻列表顺序）"""
+
+    def __init__(self, news_items: List[NewsItem], patterns: Iterable[str]) -> None:
+        self.items = news_items
+        self.automaton = AhoCorasick(patterns)
+        self._first: Dict[str, int] = {}
+        for idx, item in enumerate(news_items):
+            for _, p in self.automaton.iter_matches(item.title):
+                if p not in self._first:
+                    self._first[p] = idx
+
+    def first(self, pattern: str) -> Optional[NewsItem]:
+        """包含 pattern 的第一条新闻"""
+        idx = self._first.get(pattern)
+        return None if idx is None else self.items[idx]
+
+    def first_of(self, patterns: Iterable[str], min_len: int = 1) -> Optional[NewsItem]:
+        """按 patterns 的优先顺序，返回第一个有命中的模式对应的首条新闻"""
+        for p in patterns:
+            if p and len(p) >= min_len:
+                idx = self._first.get(p)
+                if idx is not None:
+                    return self.items[idx]
+        return None
@@ -0,0 +1,121 @@
+"""依赖感知的阶段执行器 — 无依赖的阶段并发执行"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+
+class StageError(RuntimeError):
+    """关键阶段失败"""
+
+    def __init__(self, stage: str, cause: BaseException) -> None:
+        super().__init__(f"{stage}: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+
+@dataclass
+class Stage:
+    """单个执行阶段
+
+    func 可以是普通函数（在线程池中运行）或协程函数（在事件循环中运行）。
+    critical=True 的阶段失败时取消其余阶段并抛出 StageError；
+    否则只打印警告，依赖它的阶段照常执行。
+    """
+    name: str
+    func: Callable[[], Union[object, Awaitable[object]]]
+    deps: List[str] = field(default_factory=list)
+    critical: bool = False
+    error_label: str = ""
+
+
+@dataclass
+class StageResult:
+    """阶段执行结果"""
+    name: str
+    ok: bool = False
+    value: object = None
+    error: Optional[BaseException] = None
+    started: float = 0.0   # 相对 pipeline 启动的秒数
+    elapsed: float = 0.0
+
+
+class Pipeline:
+    """按依赖关系调度阶段：每个阶段只等待自己声明的依赖"""
+
+    def __init__(self, stages: List[Stage]) -> None:
+        names = [s.name for s in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("阶段名称重复")
+        self.stages: Dict[str, Stage] = {s.name: s for s in stages}
+        for s in stages:
+            for dep in s.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"阶段 {s.name} 依赖未知阶段 {dep}")
+        self._check_acyclic()
+        self.results: Dict[str, StageResult] = {}
+
+    def _check_acyclic(self) -> None:
+        state: Dict[str, int] = {}  # 1=访问中 2=完成
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"阶段依赖存在环: {name}")
+            state[name] = 1
+            for dep in self.stages[name].deps:
+                visit(dep)
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(self) -> Dict[str, StageResult]:
+        """执行全部阶段，返回 {阶段名: StageResult}"""
+        t0 = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> StageResult:
+            if stage.deps:
+                await asyncio.gather(*(tasks[d] for d in stage.deps))
+            result = StageResult(name=stage.name)
+            start = time.perf_counter()
+            result.started = start - t0
+            try:
+                if inspect.iscoroutinefunction(stage.func):
+                    result.value = await stage.func()
+                else:
+                    result.value = await asyncio.to_thread(stage.func)
+                result.ok = True
+            except Exception as e:
+                result.error = e
+                if stage.critical:
+                    raise StageError(stage.name, e) from e
+                label = stage.error_label or stage.name
+                print(f"[警告] {label}失败: {e}")
+            finally:
+                result.elapsed = time.perf_counter() - start
+                self.results[stage.name] = result
+            return result
+
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.create_task(run_stage(stage), name=name)
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except StageError:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return self.results
+
+    def timings(self) -> Dict[str, float]:
+        """{阶段名: 耗时秒}，按启动顺序"""
+        ordered = sorted(self.results.values(), key=lambda r: r.started)
+        return {r.name: round(r.elapsed, 3) for r in ordered}
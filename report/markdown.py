@@ -1,5 +1,6 @@
 """Markdown 文件报告生成"""
 
+import math
 import os
 from datetime import datetime
 
@@ -48,6 +49,7 @@ def save(report: MarketReport) -> str:
         lines.append(f"| 平盘 | {s.flat_count} |")
         lines.append(f"| 涨停 | {s.limit_up_count} |")
         lines.append(f"| 跌停 | {s.limit_down_count} |")
+        lines.append(f"| 炸板 | {s.limit_opened_count} |")
         lines.append("")
 
     # --- 资金流向 ---
@@ -62,6 +64,17 @@ def save(report: MarketReport) -> str:
         if not ff.stock_outflow.empty:
             lines.append("## 个股主力净流出 TOP\n")
             lines.append(_fund_stock_table(ff.stock_outflow, reasons))
+        if ff.sector_deltas is not None and not ff.sector_deltas.empty:
+            lines.append("## 板块主力资金日内变化\n")
+            lines.append(_flow_delta_table(ff.sector_deltas))
+
+    # --- 板块全景（本地聚合） ---
+    if report.sector_stats is not None and not report.sector_stats.empty:
+        for kind in ("行业", "概念"):
+            part = report.sector_stats[report.sector_stats["类型"] == kind]
+            if not part.empty:
+                lines.append(f"## {kind}板块全景 TOP\n")
+                lines.append(_sector_stats_table(part))
 
     # --- 板块 ---
     if report.sector:
@@ -112,7 +125,8 @@ def save(report: MarketReport) -> str:
                 time_str = ""
                 if item.publish_time:
                     time_str = f" ({item.publish_time.strftime('%m-%d %H:%M')})"
-                lines.append(f"{count}. {title}{time_str} — {item.source}")
+                source = " / ".join(item.sources) if item.sources else item.source
+                lines.append(f"{count}. {title}{time_str} — {source}")
         lines.append("")
 
     # --- 风险提示 ---
@@ -204,6 +218,8 @@ def _watch_sector_section(sec_data: dict) -> str:
 
     # 成分股明细
     if stocks is not None and not stocks.empty:
+        # 停牌股的缺失值按 None 显示为 --
+        stocks = stocks.astype(object).where(stocks.notna(), None)
         lines.append("| # | 代码 | 名称 | 最新价 | 涨跌幅 | 成交额 | 换手率 | 主力净流入 | 主力占比 |")
         lines.append("|---|------|------|--------|--------|--------|--------|-----------|---------|")
         for i, (_, row) in enumerate(stocks.iterrows()):
@@ -318,6 +334,57 @@ def _fund_sector_table(df) -> str:
     return "\n".join(rows)
 
 
+def _sector_stats_table(df, top: int = 10) -> str:
+    """本地聚合的板块统计表（已按成交额加权涨跌幅排序）"""
+    has_limit = "涨停" in df.columns
+    has_flow = "主力净流入" in df.columns
+    header = "| # | 板块 | 涨跌幅 | 等权 | 涨/跌 |"
+    sep = "|---|------|--------|------|-------|"
+    if has_limit:
+        header += " 涨停 |"
+        sep += "------|"
+    if has_flow:
+        header += " 主力净流入 |"
+        sep += "-----------|"
+    header += " 领涨股 |"
+    sep += "--------|"
+
+    rows = [header, sep]
+    for i, (name, row) in enumerate(df.head(top).iterrows()):
+        line = (f"| {i + 1} | {name} | {row['涨跌幅']:+.2f}% | {row['等权涨跌幅']:+.2f}% | "
+                f"{row['上涨']}/{row['下跌']} |")
+        if has_limit:
+            line += f" {row['涨停']} |"
+        if has_flow:
+            line += f" {_fmt_amount(row['主力净流入'])} |"
+        leader = row["领涨股"]
+        if leader:
+            leader = f"{leader}({row['领涨股涨跌幅']:+.2f}%)"
+        line += f" {leader or '--'} |"
+        rows.append(line)
+    rows.append("")
+    return "\n".join(rows)
+
+
+def _flow_delta_table(df, top: int = 10) -> str:
+    """板块主力净流入日内变化表（按中间窗口的增量排序）"""
+    windows = [c for c in df.columns if c != "最新"]
+    key = windows[len(windows) // 2] if windows else "最新"
+    df = df.sort_values(key, ascending=False, na_position="last").head(top)
+
+    rows = [
+        "| # | 板块 | 主力净流入 | " + " | ".join(windows) + " |",
+        "|---|------|-----------|" + "|".join("------" for _ in windows) + "|",
+    ]
+    for i, (name, row) in enumerate(df.iterrows()):
+        deltas = " | ".join(
+            "--" if math.isnan(row[w]) else _fmt_amount(row[w]) for w in windows
+        )
+        rows.append(f"| {i + 1} | {name} | {_fmt_amount(row['最新'])} | {deltas} |")
+    rows.append("")
+    return "\n".join(rows)
+
+
 def _fund_stock_table(df, reasons=None) -> str:
     """个股资金流向表"""
     if df.empty:
@@ -1,5 +1,6 @@
 """Rich 终端报告渲染"""
 
+import math
 from datetime import datetime
 
 from rich.console import Console
@@ -35,13 +36,18 @@ def render(report: MarketReport) -> None:
             f"  上涨 [red]{s.up_count}[/red]  下跌 [green]{s.down_count}[/green]  "
             f"平盘 {s.flat_count}  "
             f"涨停 [bold red]{s.limit_up_count}[/bold red]  "
-            f"跌停 [bold green]{s.limit_down_count}[/bold green]"
+            f"跌停 [bold green]{s.limit_down_count}[/bold green]  "
+            f"炸板 {s.limit_opened_count}"
         )
 
     # ====== 板块涨跌 ======
     if report.sector:
         _render_sector(report)
 
+    # ====== 板块全景（本地聚合） ======
+    if report.sector_stats is not None and not report.sector_stats.empty:
+        _render_sector_stats(report)
+
     # ====== 个股 TOP ======
     if report.stock:
         _render_stocks(report)
@@ -88,6 +94,46 @@ def _render_sector(report: MarketReport):
         _print_sector_table(sec.concept_losers)
 
 
+def _render_sector_stats(report: MarketReport, top: int = 10):
+    stats = report.sector_stats
+    for kind in ("行业", "概念"):
+        df = stats[stats["类型"] == kind].head(top)
+        if df.empty:
+            continue
+        console.print()
+        console.print(f"[bold yellow]═══ {kind}板块全景 TOP ═══[/bold yellow]")
+
+        table = Table(show_header=True, header_style="bold", padding=(0, 1))
+        table.add_column("#", width=3, justify="center")
+        table.add_column("板块", width=14)
+        table.add_column("涨跌幅", width=8, justify="right")
+        table.add_column("等权", width=8, justify="right")
+        table.add_column("涨/跌", width=9, justify="center")
+        if "涨停" in df.columns:
+            table.add_column("涨停", width=4, justify="right")
+        if "主力净流入" in df.columns:
+            table.add_column("主力净流入(万)", width=14, justify="right")
+        table.add_column("领涨股", width=18)
+
+        for idx, (name, row) in enumerate(df.iterrows()):
+            color = "red" if row["涨跌幅"] > 0 else "green"
+            cols = [
+                str(idx + 1), str(name),
+                f"[{color}]{row['涨跌幅']:+.2f}%[/{color}]",
+                f"{row['等权涨跌幅']:+.2f}%",
+                f"{row['上涨']}/{row['下跌']}",
+            ]
+            if "涨停" in df.columns:
+                cols.append(str(row["涨停"]))
+            if "主力净流入" in df.columns:
+                cols.append(f"{row['主力净流入'] / 1e4:.0f}")
+            leader = row["领涨股"]
+            cols.append(f"{leader} {row['领涨股涨跌幅']:+.2f}%" if leader else "--")
+            table.add_row(*cols)
+
+        console.print(table)
+
+
 def _print_sector_table(df):
     if df.empty:
         console.print("  [dim]数据暂不可用[/dim]")
@@ -190,6 +236,37 @@ def _render_fund_flow(report: MarketReport):
         console.print("[bold green]═══ 个股主力净流出 TOP ═══[/bold green]")
         _print_fund_table(ff.stock_outflow, is_sector=False)
 
+    if ff.sector_deltas is not None and not ff.sector_deltas.empty:
+        console.print()
+        console.print("[bold yellow]═══ 板块主力资金日内变化 ═══[/bold yellow]")
+        _print_flow_delta_table(ff.sector_deltas)
+
+
+def _print_flow_delta_table(df, top: int = 10):
+    windows = [c for c in df.columns if c != "最新"]
+    key = windows[len(windows) // 2] if windows else "最新"
+    df = df.sort_values(key, ascending=False, na_position="last").head(top)
+
+    table = Table(show_header=True, header_style="bold", padding=(0, 1))
+    table.add_column("#", width=3, justify="center")
+    table.add_column("板块", width=14)
+    table.add_column("主力净流入(万)", width=14, justify="right")
+    for w in windows:
+        table.add_column(f"{w}(万)", width=10, justify="right")
+
+    for idx, (name, row) in enumerate(df.iterrows()):
+        cols = [str(idx + 1), str(name), f"{row['最新'] / 1e4:.0f}"]
+        for w in windows:
+            val = row[w]
+            if math.isnan(val):
+                cols.append("--")
+                continue
+            color = "red" if val > 0 else "green"
+            cols.append(f"[{color}]{val / 1e4:+.0f}[/{color}]")
+        table.add_row(*cols)
+
+    console.print(table)
+
 
 def _print_fund_table(df, is_sector=False):
     if df.empty:
@@ -277,7 +354,8 @@ def _render_news(report: MarketReport):
         if title not in seen and count < 15:
             seen.add(title)
             count += 1
-            src_tag = f"[dim]{item.source}[/dim]"
+            source = "/".join(item.sources) if item.sources else item.source
+            src_tag = f"[dim]{source}[/dim]"
             time_str = ""
             if item.publish_time:
                 time_str = f" [dim]{item.publish_time.strftime('%m-%d %H:%M')}[/dim]"
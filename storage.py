@@ -0,0 +1,39 @@
+"""本地存储 — 项目内缓存 / 归档路径与 SQLite 连接"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+
+from config import ARCHIVE_DIR, CACHE_DIR
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def project_path(*parts: str) -> str:
+    """项目根目录下的路径"""
+    return os.path.join(PROJECT_ROOT, *parts)
+
+
+def cache_path(*parts: str) -> str:
+    """CACHE_DIR 下的路径"""
+    return project_path(CACHE_DIR, *parts)
+
+
+def archive_path(*parts: str) -> str:
+    """ARCHIVE_DIR 下的路径"""
+    return project_path(ARCHIVE_DIR, *parts)
+
+
+def open_sqlite(path: str, schema: str, *pragmas: str) -> sqlite3.Connection:
+    """打开 SQLite 库（必要时创建目录）：WAL 模式、可跨线程使用，执行建表脚本
+
+    连接不做线程同步，调用方自行加锁；pragmas 为额外的 PRAGMA 语句，如 "synchronous=NORMAL"。
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    for pragma in pragmas:
+        db.execute(f"PRAGMA {pragma}")
+    db.executescript(schema)
+    return db
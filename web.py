@@ -7,13 +7,19 @@
 浏览器打开 http://localhost:8088 即可查看报告。
 """
 
+import json
+import math
 import os
 import re
 import argparse
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import markdown
-from flask import Flask, render_template_string
+from flask import Flask, jsonify, render_template_string, request
+
+from data.flow_series import flow_sampler
+from data.snapshot_store import snapshot_store
+from news.archive import news_archive
 
 # 项目根目录 & 报告目录
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -57,6 +63,21 @@ def _list_reports():
     return reports
 
 
+def _parse_time(value, end=False):
+    """解析 YYYY-MM-DD / YYYY-MM-DD HH:MM；纯日期作为结束时间时取次日零点"""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y%m%d"):
+        try:
+            t = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end and fmt in ("%Y-%m-%d", "%Y%m%d"):
+            t += timedelta(days=1)
+        return t
+    raise ValueError(f"无法解析时间: {value}")
+
+
 def _read_report(filepath):
     """读取 md 文件并转为 HTML"""
     with open(filepath, "r", encoding="utf-8") as f:
@@ -415,6 +436,99 @@ def report(filename):
     )
 
 
+@app.route("/api/news")
+def api_news():
+    """新闻检索: /api/news?q=稀土&from=2026-10-01&to=2026-10-31&source=sina&limit=100"""
+    try:
+        start = _parse_time(request.args.get("from", ""))
+        end = _parse_time(request.args.get("to", ""), end=True)
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    items = news_archive.search(
+        q=request.args.get("q", ""),
+        start=start, end=end,
+        source=request.args.get("source", ""),
+        limit=limit,
+    )
+    return jsonify({"count": len(items), "items": items})
+
+
+@app.route("/api/flow/deltas")
+def api_flow_deltas():
+    """日内资金流变化: /api/flow/deltas?kind=sector&windows=5,15,30&keys=半导体,银行
+
+    kind=sector 按板块名、kind=stock 按代码；不传 keys 返回全部（按最新净流入降序）。
+    """
+    kind = request.args.get("kind", "sector")
+    if kind not in ("sector", "stock"):
+        return jsonify({"error": f"未知类型: {kind}"}), 400
+    try:
+        windows = [int(w) for w in request.args.get("windows", "5,15,30").split(",") if w]
+        limit = min(int(request.args.get("limit", 100)), 10000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    keys = [k for k in request.args.get("keys", "").split(",") if k] or None
+
+    df = flow_sampler.deltas(kind, windows, keys)
+    if keys is None:
+        df = df.sort_values("最新", ascending=False)
+    df = df.head(limit)
+    ring = flow_sampler.ring(kind)
+    updated = ring.updated_at() if ring is not None else None
+    items = [
+        {"key": key, **{c: (None if math.isnan(v) else float(v)) for c, v in row.items()}}
+        for key, row in zip(df.index, df.to_dict("records"))
+    ]
+    return jsonify({
+        "kind": kind,
+        "updated_at": updated.strftime("%Y-%m-%d %H:%M:%S") if updated else None,
+        "count": len(items),
+        "items": items,
+    })
+
+
+@app.route("/api/snapshots")
+def api_snapshots():
+    """快照清单: /api/snapshots?dataset=snapshot&from=2026-10-01&to=2026-10-31"""
+    try:
+        start = _parse_time(request.args.get("from", ""))
+        end = _parse_time(request.args.get("to", ""))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    entries = snapshot_store.entries(
+        request.args.get("dataset", ""),
+        start.date() if start else None, end.date() if end else None,
+    )
+    for entry in entries:
+        entry.pop("path")
+    return jsonify({"count": len(entries), "items": entries})
+
+
+@app.route("/api/snapshots/<dataset>")
+def api_snapshot_data(dataset):
+    """读取历史快照: /api/snapshots/snapshot?from=2026-10-01&to=2026-10-31&columns=代码,涨跌幅
+
+    只读取 columns 指定的列（建议总是指定）；sessions=morning,afternoon 筛选场次。
+    """
+    try:
+        start = _parse_time(request.args.get("from", ""))
+        end = _parse_time(request.args.get("to", ""))
+        limit = min(int(request.args.get("limit", 1000)), 100000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    columns = [c for c in request.args.get("columns", "").split(",") if c] or None
+    sessions = [s for s in request.args.get("sessions", "").split(",") if s] or None
+    try:
+        df = snapshot_store.read(dataset, start.date() if start else None,
+                                 end.date() if end else None, columns, sessions)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+    total = len(df)
+    items = json.loads(df.head(limit).to_json(orient="records", force_ascii=False))
+    return jsonify({"dataset": dataset, "total": total, "count": len(items), "items": items})
+
+
 # ─────────────────────── 启动 ───────────────────────
 
 if __name__ == "__main__":